@@ -2,16 +2,21 @@
 FastAPI routes for AI/NLP mapping service
 """
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, status
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Union
 import time
 
 from app.api import schemas
 from app.services.mapping_service import mapping_service
 from app.models.embedder import embedder
+from app.models.batcher import embedding_batcher
 from app.models.mapper import mapper
+from app.services.preprocessing import preprocessor
 from app.config import settings
+from app.utils.cache import result_cache, embedding_cache
+from app.utils.executor import ServiceOverloadedError, inference_executor
+from app.utils.feedback_store import feedback_store
 from app.utils.logger import logger
 
 # Create router
@@ -49,6 +54,13 @@ async def map_namaste_to_icd11(request: schemas.MappingRequest):
             processing_time_ms=result["processing_time_ms"]
         )
         
+    except ServiceOverloadedError as e:
+        logger.warning(f"Request rejected: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"}
+        )
     except Exception as e:
         logger.error(f"Mapping request failed: {e}")
         raise HTTPException(
@@ -57,6 +69,46 @@ async def map_namaste_to_icd11(request: schemas.MappingRequest):
         )
 
 
+@router.post(
+    "/map/batch",
+    response_model=schemas.BatchMappingResponse,
+    summary="Map NAMASTE to ICD-11 in bulk",
+    description="Map up to 500 AYUSH/NAMASTE diseases to ICD-11 codes in a single request"
+)
+async def map_batch(request: schemas.BatchMappingRequest):
+    """
+    Map many NAMASTE diseases to ICD-11 codes
+    
+    Preprocessing, embedding and similarity scoring run once for the whole
+    batch; results are returned in request order
+    """
+    try:
+        result = await mapping_service.map_batch(
+            [item.model_dump() for item in request.items]
+        )
+        
+        return schemas.BatchMappingResponse(
+            results=result["results"],
+            count=result["count"],
+            timestamp=datetime.utcnow(),
+            processing_time_ms=result["processing_time_ms"]
+        )
+        
+    except ServiceOverloadedError as e:
+        logger.warning(f"Request rejected: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"}
+        )
+    except Exception as e:
+        logger.error(f"Batch mapping request failed: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Batch mapping failed: {str(e)}"
+        )
+
+
 @router.post(
     "/feedback",
     response_model=schemas.FeedbackResponse,
@@ -112,11 +164,33 @@ async def health_check():
         status="healthy" if stats["is_initialized"] else "initializing",
         model_loaded=stats["model_loaded"],
         icd11_codes_loaded=stats["icd11_codes_loaded"],
-        cache_enabled=settings.redis_enabled,
+        cache_enabled=settings.cache_enabled,
         uptime_seconds=round(uptime, 2)
     )
 
 
+@router.get(
+    "/metrics",
+    response_model=schemas.MetricsResponse,
+    summary="Runtime metrics",
+    description="Get request batching, inference pool, cache and feedback log statistics for throughput and latency tuning"
+)
+async def get_metrics():
+    """
+    Get runtime metrics
+    """
+    return schemas.MetricsResponse(
+        batching=embedding_batcher.get_stats(),
+        inference=inference_executor.get_stats(),
+        cache=schemas.CacheStats(
+            results=result_cache.get_stats(),
+            embeddings=embedding_cache.get_stats(),
+            preprocessing=preprocessor.get_cache_stats()
+        ),
+        feedback=feedback_store.get_stats()
+    )
+
+
 @router.get(
     "/models",
     response_model=schemas.ModelsResponse,
@@ -144,13 +218,13 @@ async def get_models_info():
     "/ayush/search",
     response_model=schemas.AyushSearchResponse,
     summary="Search AYUSH codes",
-    description="Search AYUSH/NAMASTE codes by text query with optional category filter"
+    description="Search AYUSH/NAMASTE codes by text query with optional category filter, most relevant first"
 )
 async def search_ayush_codes(
     query: str,
     category: Optional[str] = None,
-    limit: int = 20,
-    offset: int = 0
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0)
 ):
     """
     Search AYUSH codes by text query
@@ -176,47 +250,69 @@ async def search_ayush_codes(
 
 
 @router.get(
-    "/ayush/{code}",
-    response_model=schemas.AyushCode,
-    summary="Get AYUSH code details",
-    description="Get detailed information about a specific AYUSH code"
+    "/ayush/suggest",
+    response_model=schemas.AyushSuggestResponse,
+    summary="Autocomplete AYUSH codes",
+    description="Complete a name or code prefix, ranked by field and popularity"
 )
-async def get_ayush_code(code: str):
+async def suggest_ayush_codes(prefix: str, limit: int = Query(10, ge=1, le=100)):
     """
-    Get specific AYUSH code by ID
+    Autocomplete AYUSH codes for search-as-you-type
+    
+    Matches the start of the name, English name, diacritical name or code
     """
     try:
-        result = await mapping_service.get_ayush_code(code)
-        
-        if not result:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"AYUSH code not found: {code}"
-            )
+        result = await mapping_service.suggest_ayush_codes(prefix=prefix, limit=limit)
+        return schemas.AyushSuggestResponse(**result)
         
-        return schemas.AyushCode(**result)
+    except Exception as e:
+        logger.error(f"Suggest failed: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Suggest failed: {str(e)}"
+        )
+
+
+@router.post(
+    "/ayush/lookup",
+    response_model=schemas.AyushLookupResponse,
+    summary="Bulk AYUSH code lookup",
+    description="Resolve up to 1000 AYUSH codes (or NAMC IDs) in one request"
+)
+async def lookup_ayush_codes(request: schemas.AyushLookupRequest):
+    """
+    Get details for several AYUSH codes at once
+    
+    Unknown identifiers are listed in not_found instead of failing the request
+    """
+    try:
+        result = await mapping_service.lookup_ayush_codes(request.codes)
+        return schemas.AyushLookupResponse(**result)
         
-    except HTTPException:
-        raise
     except Exception as e:
-        logger.error(f"Failed to get AYUSH code: {e}")
+        logger.error(f"AYUSH code lookup failed: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to get code: {str(e)}"
+            detail=f"Lookup failed: {str(e)}"
         )
 
 
 @router.get(
     "/ayush/categories",
-    response_model=List[str],
+    response_model=Union[List[str], schemas.CategoryFacetsResponse],
     summary="Get AYUSH categories",
-    description="Get list of all available AYUSH code categories"
+    description="Get list of all available AYUSH code categories, with code counts if facets=true"
 )
-async def get_categories():
+async def get_categories(facets: bool = False):
     """
     Get list of all unique categories
+    
+    With facets=true, returns each category with its number of codes
     """
     try:
+        if facets:
+            return schemas.CategoryFacetsResponse(**mapping_service.get_category_facets())
+        
         categories = mapping_service.get_categories()
         return categories
         
@@ -228,6 +324,37 @@ async def get_categories():
         )
 
 
+@router.get(
+    "/ayush/{code}",
+    response_model=schemas.AyushCode,
+    summary="Get AYUSH code details",
+    description="Get detailed information about a specific AYUSH code"
+)
+async def get_ayush_code(code: str):
+    """
+    Get specific AYUSH code by ID
+    """
+    try:
+        result = await mapping_service.get_ayush_code(code)
+        
+        if not result:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"AYUSH code not found: {code}"
+            )
+        
+        return schemas.AyushCode(**result)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get AYUSH code: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get code: {str(e)}"
+        )
+
+
 @router.post(
     "/recommend",
     response_model=schemas.RecommendationResponse,
@@ -238,17 +365,26 @@ async def get_recommendations(request: schemas.RecommendationRequest):
     """
     Get AI-powered AYUSH code recommendations
     
-    Uses semantic similarity to match symptoms with AYUSH codes
+    Matches symptoms with AYUSH codes by keyword (BM25) and semantic
+    similarity, fused as configured by RETRIEVAL_MODE
     """
     try:
         result = await mapping_service.get_recommendations(
             symptoms=request.symptoms,
             patient_history=request.patient_history,
-            top_k=request.top_k
+            top_k=request.top_k,
+            category=request.category
         )
         
         return schemas.RecommendationResponse(**result)
         
+    except ServiceOverloadedError as e:
+        logger.warning(f"Request rejected: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"}
+        )
     except Exception as e:
         logger.error(f"Recommendation failed: {e}")
         raise HTTPException(
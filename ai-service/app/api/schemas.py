@@ -3,7 +3,7 @@ Pydantic schemas for API request/response validation
 """
 
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 
@@ -35,6 +35,9 @@ class Suggestion(BaseModel):
     chapter: str = Field("", description="ICD-11 chapter")
     confidence: float = Field(..., description="Confidence score (0-1)", ge=0, le=1)
     confidence_level: str = Field(..., description="Confidence level: high/medium/low")
+    acceptance_rate: Optional[float] = Field(
+        None, description="Doctor acceptance rate of an established mapping (0-1)", ge=0, le=1
+    )
     
     class Config:
         json_schema_extra = {
@@ -79,6 +82,44 @@ class MappingResponse(BaseModel):
         }
 
 
+class BatchMappingRequest(BaseModel):
+    """Request schema for batch NAMASTE to ICD-11 mapping"""
+    
+    items: List[MappingRequest] = Field(
+        ...,
+        description="Mapping requests to process together",
+        min_length=1,
+        max_length=500
+    )
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "items": [
+                    {"namaste_code": "AYU-001", "disease_name": "Amlapitta", "top_k": 3},
+                    {"namaste_code": "AYU-002", "disease_name": "Jwara", "symptoms": "High fever", "top_k": 3}
+                ]
+            }
+        }
+
+
+class BatchMappingResult(BaseModel):
+    """Mapping result for a single item of a batch"""
+    
+    namaste_code: str = Field(..., description="Original NAMASTE code")
+    disease_name: str = Field(..., description="Original disease name")
+    suggestions: List[Suggestion] = Field(..., description="List of ICD-11 suggestions")
+
+
+class BatchMappingResponse(BaseModel):
+    """Response schema for batch mapping results"""
+    
+    results: List[BatchMappingResult] = Field(..., description="Results in request order")
+    count: int = Field(..., description="Number of mapped items")
+    timestamp: datetime = Field(default_factory=datetime.utcnow, description="Response timestamp")
+    processing_time_ms: Optional[float] = Field(None, description="Processing time in milliseconds")
+
+
 class FeedbackRequest(BaseModel):
     """Request schema for doctor feedback"""
     
@@ -131,6 +172,81 @@ class HealthResponse(BaseModel):
         }
 
 
+class BatchingStats(BaseModel):
+    """Embedding micro-batching statistics"""
+    
+    enabled: bool = Field(..., description="Whether requests are being coalesced")
+    window_ms: float = Field(..., description="Batch collection window in milliseconds")
+    max_batch_size: int = Field(..., description="Maximum texts per model call")
+    queue_depth: int = Field(..., description="Requests currently waiting to be batched")
+    max_queue_depth: int = Field(..., description="Highest queue depth observed")
+    requests_total: int = Field(..., description="Encode requests processed")
+    batches_total: int = Field(..., description="Batched model calls made")
+    avg_batch_size: float = Field(..., description="Mean requests per batch")
+    avg_queue_wait_ms: float = Field(..., description="Mean time a request waited for its batch")
+    batch_size_histogram: Dict[str, int] = Field(..., description="Number of batches per size bucket")
+
+
+class InferenceStats(BaseModel):
+    """Inference executor statistics"""
+    
+    enabled: bool = Field(..., description="Whether inference runs on the dedicated pool")
+    workers: int = Field(..., description="Inference threads")
+    pending: int = Field(..., description="Jobs running or waiting for a thread")
+    max_pending: int = Field(..., description="Admitted jobs before requests are rejected")
+    completed_total: int = Field(..., description="Jobs finished")
+    rejected_total: int = Field(..., description="Jobs rejected with HTTP 503")
+
+
+class LRUCacheStats(BaseModel):
+    """In-process LRU cache statistics"""
+    
+    size: int = Field(..., description="Entries currently cached")
+    max_entries: int = Field(..., description="Cache capacity")
+    hits: int = Field(..., description="Lookups served from the cache")
+    misses: int = Field(..., description="Lookups not found or expired")
+    evictions: int = Field(..., description="Entries evicted to stay within capacity")
+    hit_rate: float = Field(..., description="hits / (hits + misses)")
+
+
+class QueryCacheStats(BaseModel):
+    """Two-tier query cache statistics"""
+    
+    local: LRUCacheStats
+    redis_enabled: bool = Field(..., description="Whether the Redis tier is attached")
+    redis_hits: int = Field(..., description="Local misses served from Redis")
+    redis_misses: int = Field(..., description="Lookups missing from both tiers")
+    redis_errors: int = Field(..., description="Failed Redis calls (treated as misses)")
+
+
+class FeedbackStoreStats(BaseModel):
+    """Feedback log writer statistics"""
+    
+    enabled: bool = Field(..., description="Whether the background writer is running")
+    path: str = Field(..., description="Feedback log file")
+    queue_depth: int = Field(..., description="Records waiting to be written")
+    records_written: int = Field(..., description="Records appended since startup")
+    flushes: int = Field(..., description="Write + fsync calls made")
+    avg_records_per_flush: float = Field(..., description="Mean records sharing one fsync")
+
+
+class CacheStats(BaseModel):
+    """Query cache statistics"""
+    
+    results: QueryCacheStats = Field(..., description="/map and /recommend result cache")
+    embeddings: QueryCacheStats = Field(..., description="Query embedding cache")
+    preprocessing: LRUCacheStats = Field(..., description="Memoized preprocessing pipeline output")
+
+
+class MetricsResponse(BaseModel):
+    """Response schema for runtime metrics"""
+    
+    batching: BatchingStats
+    inference: InferenceStats
+    cache: CacheStats
+    feedback: FeedbackStoreStats
+
+
 class ModelInfo(BaseModel):
     """Model information schema"""
     
@@ -172,12 +288,66 @@ class AyushSearchResponse(BaseModel):
     has_more: bool = Field(..., description="Whether more results exist")
 
 
+class CategoryFacet(BaseModel):
+    """Category with its number of codes"""
+    
+    name: str = Field(..., description="Category name")
+    count: int = Field(..., description="Number of AYUSH codes in the category")
+
+
+class CategoryFacetsResponse(BaseModel):
+    """Response schema for category facets"""
+    
+    categories: List[CategoryFacet] = Field(..., description="Categories sorted by name")
+    total_codes: int = Field(..., description="Total number of AYUSH codes")
+
+
+class AyushLookupRequest(BaseModel):
+    """Request schema for bulk AYUSH code lookup"""
+    
+    codes: List[str] = Field(..., description="AYUSH codes or NAMC IDs", min_length=1, max_length=1000)
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "codes": ["AYU-001", "AYU-002"]
+            }
+        }
+
+
+class AyushLookupResponse(BaseModel):
+    """Response schema for bulk AYUSH code lookup"""
+    
+    results: List[AyushCode] = Field(..., description="Found codes, in request order")
+    not_found: List[str] = Field(..., description="Requested identifiers with no matching code")
+
+
+class AyushSuggestion(BaseModel):
+    """Single autocomplete suggestion"""
+    
+    code: str = Field(..., description="AYUSH code")
+    text: str = Field(..., description="Completed term (lowercase)")
+    matched_field: str = Field(..., description="Field the term comes from: name, name_english, name_diacritical or code")
+    name: str = Field(..., description="AYUSH term name")
+    name_english: str = Field("", description="English name")
+    category: str = Field("", description="Category")
+    score: float = Field(..., description="Ranking weight (field weight plus popularity)")
+
+
+class AyushSuggestResponse(BaseModel):
+    """Response schema for AYUSH code autocomplete"""
+    
+    prefix: str = Field(..., description="Prefix that was completed")
+    suggestions: List[AyushSuggestion] = Field(..., description="Suggestions, best first")
+
+
 class RecommendationRequest(BaseModel):
     """Request schema for AI recommendations"""
     
     symptoms: str = Field(..., description="Patient symptoms description", example="fever, cough, breathlessness")
     patient_history: Optional[str] = Field(None, description="Optional patient history")
     top_k: Optional[int] = Field(5, description="Number of recommendations", ge=1, le=20)
+    category: Optional[str] = Field(None, description="Only recommend codes from this category")
 
 
 class AyushRecommendation(BaseModel):
@@ -20,10 +20,56 @@ class Settings(BaseSettings):
     embedding_dim: int = 384
     top_k_results: int = 5
     
+    # Inference Execution
+    inference_workers: int = 2  # Threads running preprocessing, encoding and scoring
+    inference_intra_op_threads: int = 0  # Threads per torch/BLAS op, 0 = library default
+    inference_max_pending: int = 64  # Jobs admitted before new requests get HTTP 503
+    
+    # Request Batching
+    batching_enabled: bool = True  # Coalesce concurrent query encodes into batches
+    batch_window_ms: float = 3.0  # Max wait for more requests after the first one
+    batch_max_size: int = 64
+    
+    # Bulk Preprocessing (spaCy nlp.pipe, used when embedding the datasets)
+    preprocess_batch_size: int = 256  # Texts per nlp.pipe batch
+    preprocess_n_process: int = 1  # spaCy worker processes at startup, -1 = all cores
+    
+    # Vector Index
+    ann_backend: str = "exact"  # "exact" (brute force), "ivf" (approximate) or "int8" (quantized scan)
+    ann_min_rows: int = 5000  # Smaller corpora always use exact search
+    ivf_nlist: int = 0  # Number of IVF cells, 0 = about 4*sqrt(rows)
+    ivf_nprobe: int = 8  # Cells scanned per query; higher = better recall, slower
+    ivf_kmeans_iterations: int = 20
+    quantization_rescore_factor: int = 4  # int8: shortlist of factor * top_k rows rescored in float32, 0 = off
+    
+    # Precomputed Mapping Table
+    mapping_table_enabled: bool = True  # Answer /map for known codes without symptoms from a precomputed table
+    mapping_table_top_k: int = 10  # ICD-11 matches stored per NAMASTE code
+    all_pairs_memory_mb: int = 256  # Working memory cap for all-pairs similarity (table builds, cross-mapping)
+    
+    # Recommendation Retrieval
+    retrieval_mode: str = "dense"  # "dense" (embeddings), "sparse" (BM25) or "hybrid" (both, fused)
+    hybrid_candidates: int = 300  # BM25 candidates re-scored with embeddings per query
+    hybrid_min_candidates: int = 20  # Fewer BM25 candidates than this falls back to a full dense scan
+    rrf_k: int = 60  # Reciprocal rank fusion constant
+    
+    # Feedback Re-ranking
+    feedback_rerank_enabled: bool = True  # Adjust /map results by doctor accept/reject feedback
+    feedback_boost: float = 0.15  # Largest score change from feedback
+    feedback_prior: float = 2.0  # Pseudo-count damping adjustments from few votes
+    feedback_candidates: int = 20  # Extra ICD-11 candidates fetched so demoted codes can be replaced
+    feedback_shortcut_min_accepts: int = 5  # Acceptances before a mapping skips embedding entirely
+    feedback_shortcut_min_ratio: float = 0.9  # Acceptance rate needed for that shortcut
+    
     # Confidence Thresholds
     high_confidence_threshold: float = 0.85
     medium_confidence_threshold: float = 0.70
     
+    # Query Cache (in-process LRU, optionally backed by Redis)
+    cache_enabled: bool = True
+    cache_max_entries: int = 10000
+    preprocess_cache_size: int = 10000  # Memoized preprocessing results, 0 = off
+    
     # Redis Configuration
     redis_enabled: bool = False
     redis_host: str = "localhost"
@@ -46,7 +92,10 @@ class Settings(BaseSettings):
     # Data Paths
     namaste_data_path: str = "data/namaste_codes.json"
     icd11_data_path: str = "data/icd11_codes.json"
-    feedback_data_path: str = "data/feedback.json"
+    feedback_data_path: str = "data/feedback.jsonl"  # Append-only JSON Lines; a legacy feedback.json is migrated once
+    synonyms_data_path: str = "data/ayush_synonyms.json"
+    embedding_cache_dir: str = "data/embeddings"
+    embedding_mmap: bool = True  # Share cached matrices across workers via mmap
     
     class Config:
         env_file = ".env"
@@ -32,6 +32,7 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down AI/NLP Mapping Service...")
+    await mapping_service.shutdown()
 
 
 # Create FastAPI app
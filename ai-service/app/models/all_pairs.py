@@ -0,0 +1,168 @@
+"""
+Memory-bounded all-pairs top-k cosine similarity
+"""
+
+from typing import Iterator, Tuple
+import numpy as np
+
+
+# Bytes held per score tile cell: the float32 score plus the int64
+# index array argpartition returns for the tile
+BYTES_PER_CELL = 12
+
+# Smallest query block worth a matrix product; below it the corpus is chunked
+MIN_QUERY_ROWS = 64
+
+
+def plan_blocks(n_queries: int, n_corpus: int, dim: int, memory_mb: float) -> Tuple[int, int]:
+    """
+    Choose query block and corpus chunk sizes that fit a memory budget
+    
+    A tile holds the normalized query block and corpus chunk (float32
+    copies) plus the score tile and its argpartition indices. The whole
+    corpus is normalized once and scored per query block when that leaves
+    room for at least MIN_QUERY_ROWS queries; otherwise the corpus is
+    split into chunks and a running top-k is kept per query.
+    
+    Args:
+        n_queries: Number of query rows
+        n_corpus: Number of corpus rows
+        dim: Embedding dimension
+        memory_mb: Working memory budget in MiB
+    
+    Returns:
+        (query_rows, corpus_rows) per score tile
+    """
+    budget = memory_mb * 2 ** 20
+    n_queries = max(1, n_queries)
+    n_corpus = max(1, n_corpus)
+    
+    # Whole corpus: its normalized copy, then query rows with their score rows
+    corpus_rows = n_corpus
+    available = budget - corpus_rows * dim * 4
+    query_rows = int(available // (corpus_rows * BYTES_PER_CELL + dim * 4)) if available > 0 else 0
+    
+    min_rows = min(MIN_QUERY_ROWS, n_queries)
+    if query_rows < min_rows:
+        query_rows = min_rows
+        # Normalized corpus chunk copy plus the score tile for min_rows queries
+        corpus_rows = int((budget - query_rows * dim * 4) // (query_rows * BYTES_PER_CELL + dim * 4))
+    
+    return max(1, min(query_rows, n_queries)), max(1, min(corpus_rows, n_corpus))
+
+
+def _normalize_rows(rows: np.ndarray) -> np.ndarray:
+    """
+    L2-normalize rows into a new float32 array
+    
+    Unlike scoring.l2_normalize, the norms are computed without a
+    full-size squared temporary, so only the result is allocated.
+    """
+    rows = np.asarray(rows, dtype=np.float32)
+    norms = np.sqrt(np.einsum("ij,ij->i", rows, rows))
+    norms[norms == 0] = 1.0
+    return rows / norms[:, np.newaxis]
+
+
+def iter_top_k(
+    queries: np.ndarray,
+    corpus: np.ndarray,
+    k: int,
+    memory_mb: float = 256
+) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+    """
+    Stream the top-k most similar corpus rows of every query row
+    
+    Queries are processed in blocks and the corpus in chunks sized by
+    plan_blocks, so the normalized block and chunk plus one
+    [query_rows, corpus_rows] float32 score tile (and its argpartition
+    indices) stay within memory_mb, however large both sides are. Each
+    chunk's best k columns are merged into the block's running top-k.
+    Both inputs may be memory-mapped float32; only the current block and
+    chunk are read into memory (L2-normalized on the fly). Other dtypes
+    are converted chunk by chunk, which briefly needs one more copy.
+    
+    Args:
+        queries: Query embeddings (shape: [n, dim])
+        corpus: Corpus embeddings (shape: [m, dim])
+        k: Matches per query (capped at m)
+        memory_mb: Working memory budget in MiB
+    
+    Yields:
+        (start_row, indices, scores) per query block: int32 corpus rows and
+        float32 cosine similarities (shape: [block_rows, k]), best first
+    """
+    n_queries, dim = queries.shape
+    n_corpus = corpus.shape[0]
+    k = min(k, n_corpus)
+    query_rows, corpus_rows = plan_blocks(n_queries, n_corpus, dim, memory_mb)
+    
+    # A corpus scored in one chunk is normalized once for all query blocks
+    whole_corpus = _normalize_rows(corpus) if corpus_rows >= n_corpus else None
+    
+    for start in range(0, n_queries, query_rows):
+        block = _normalize_rows(queries[start:start + query_rows])
+        best_scores = np.empty((block.shape[0], 0), dtype=np.float32)
+        best_indices = np.empty((block.shape[0], 0), dtype=np.int64)
+        
+        for chunk_start in range(0, n_corpus, corpus_rows):
+            if whole_corpus is not None:
+                chunk = whole_corpus
+            else:
+                chunk = _normalize_rows(corpus[chunk_start:chunk_start + corpus_rows])
+            tile = block @ chunk.T
+            del chunk
+            
+            # Best k columns of this chunk
+            chunk_k = min(k, tile.shape[1])
+            if chunk_k < tile.shape[1]:
+                columns = np.argpartition(tile, -chunk_k, axis=1)[:, -chunk_k:]
+            else:
+                columns = np.broadcast_to(np.arange(chunk_k), tile.shape)
+            
+            # Merge with the running top-k
+            best_scores = np.concatenate([best_scores, np.take_along_axis(tile, columns, axis=1)], axis=1)
+            best_indices = np.concatenate([best_indices, columns + chunk_start], axis=1)
+            # Release the tile before the next one is allocated
+            del tile, columns
+            if best_scores.shape[1] > k:
+                keep = np.argpartition(best_scores, -k, axis=1)[:, -k:]
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                best_indices = np.take_along_axis(best_indices, keep, axis=1)
+        
+        del block
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        yield (
+            start,
+            np.take_along_axis(best_indices, order, axis=1).astype(np.int32),
+            np.take_along_axis(best_scores, order, axis=1)
+        )
+
+
+def all_pairs_top_k(
+    queries: np.ndarray,
+    corpus: np.ndarray,
+    k: int,
+    memory_mb: float = 256
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k most similar corpus rows of every query row, collected
+    
+    Args:
+        queries: Query embeddings (shape: [n, dim])
+        corpus: Corpus embeddings (shape: [m, dim])
+        k: Matches per query (capped at m)
+        memory_mb: Working memory budget in MiB (excluding the results)
+    
+    Returns:
+        (indices, scores): int32 and float32 arrays of shape [n, k], best first
+    """
+    k = min(k, corpus.shape[0])
+    indices = np.empty((queries.shape[0], k), dtype=np.int32)
+    scores = np.empty((queries.shape[0], k), dtype=np.float32)
+    
+    for start, block_indices, block_scores in iter_top_k(queries, corpus, k, memory_mb):
+        indices[start:start + block_indices.shape[0]] = block_indices
+        scores[start:start + block_scores.shape[0]] = block_scores
+    
+    return indices, scores
@@ -0,0 +1,599 @@
+"""
+Vector index backends for nearest-neighbor search over embeddings
+"""
+
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import List, Optional, Tuple
+import numpy as np
+
+from app.config import settings
+from app.models.scoring import VectorScorer, is_normalized, l2_normalize, select_top_k
+from app.utils.files import atomic_open
+from app.utils.logger import logger
+
+
+class VectorIndex:
+    """
+    Interface for nearest-neighbor indexes over L2-normalized embeddings
+    
+    Scores are cosine similarities; results are (row index, score) pairs
+    sorted by descending score, with row indices referring to the matrix
+    passed to build().
+    """
+    
+    backend = "base"
+    
+    def build(self, embeddings: np.ndarray):
+        """
+        Build the index over corpus embeddings
+        
+        Args:
+            embeddings: Corpus embeddings (shape: [n, dim])
+        """
+        raise NotImplementedError
+    
+    def search(self, query_embedding: np.ndarray, top_k: int) -> List[Tuple[int, float]]:
+        """
+        Find the top-k most similar rows for one query
+        
+        Args:
+            query_embedding: Query vector
+            top_k: Number of results
+        
+        Returns:
+            List of (index, similarity_score) tuples, sorted by score
+        """
+        raise NotImplementedError
+    
+    def search_batch(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: int
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Find the top-k most similar rows for several queries
+        
+        Args:
+            query_embeddings: Query matrix (shape: [n_queries, dim])
+            top_k: Number of results per query
+        
+        Returns:
+            One list of (index, similarity_score) tuples per query
+        """
+        return [self.search(query, top_k) for query in np.atleast_2d(query_embeddings)]
+    
+    def save(self, directory: Path):
+        """
+        Persist the index to a directory (no-op for indexes without state)
+        
+        Args:
+            directory: Target directory
+        """
+    
+    def load(self, directory: Path, fingerprint: str) -> bool:
+        """
+        Load a persisted index if it was built from the same embeddings
+        
+        Args:
+            directory: Directory written by save()
+            fingerprint: Fingerprint of the current corpus embeddings
+        
+        Returns:
+            True if the index was loaded, False if it must be rebuilt
+        """
+        return False
+    
+    @property
+    def size(self) -> int:
+        """Number of indexed rows"""
+        raise NotImplementedError
+
+
+class ExactIndex(VectorIndex):
+    """
+    Brute-force index: scores every row (exact results, O(n·d) per query)
+    """
+    
+    backend = "exact"
+    
+    def __init__(self):
+        """Initialize the index"""
+        self.scorer = VectorScorer()
+    
+    def build(self, embeddings: np.ndarray):
+        """Build the index by normalizing the corpus once"""
+        self.scorer.fit(embeddings)
+    
+    def search(self, query_embedding: np.ndarray, top_k: int) -> List[Tuple[int, float]]:
+        """Score every row and return the exact top-k"""
+        return self.scorer.search(query_embedding, top_k)
+    
+    def search_batch(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: int
+    ) -> List[List[Tuple[int, float]]]:
+        """Score all queries with one matrix-matrix product"""
+        return self.scorer.search_batch(query_embeddings, top_k)
+    
+    @property
+    def size(self) -> int:
+        """Number of indexed rows"""
+        return self.scorer.size
+
+
+class IVFIndex(VectorIndex):
+    """
+    Inverted file index with a spherical k-means coarse quantizer
+    
+    Rows are clustered into nlist cells; each query is compared with the
+    centroids and only the rows of the nprobe closest cells are scored.
+    Rows are stored grouped by cell, so every probed cell is one contiguous
+    matrix slice. Raising nprobe trades latency for recall; nprobe == nlist
+    is an exact (but slower) search.
+    """
+    
+    backend = "ivf"
+    FORMAT_VERSION = 1
+    
+    def __init__(
+        self,
+        nlist: int = 0,
+        nprobe: int = 8,
+        kmeans_iterations: int = 20,
+        seed: int = 0
+    ):
+        """
+        Initialize the index
+        
+        Args:
+            nlist: Number of cells (0 = about 4·sqrt(n))
+            nprobe: Number of cells scanned per query
+            kmeans_iterations: Lloyd iterations used to train the quantizer
+            seed: Random seed for k-means initialization
+        """
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.kmeans_iterations = kmeans_iterations
+        self.seed = seed
+        
+        self.centroids = None       # [nlist, dim]
+        self.list_offsets = None    # [nlist + 1], cell c spans list_offsets[c]:list_offsets[c + 1]
+        self.list_ids = None        # [n], original row index of each stored vector
+        self.list_vectors = None    # [n, dim], vectors grouped by cell
+        self.fingerprint = None
+    
+    def _resolve_nlist(self, n_rows: int) -> int:
+        """Number of cells to train for n_rows vectors"""
+        nlist = self.nlist or int(4 * np.sqrt(n_rows))
+        return max(1, min(nlist, n_rows))
+    
+    @staticmethod
+    def _assign(vectors: np.ndarray, centroids: np.ndarray, block_rows: int = 8192) -> np.ndarray:
+        """Nearest centroid (max inner product) for each vector, in blocks"""
+        assignments = np.empty(vectors.shape[0], dtype=np.int64)
+        for start in range(0, vectors.shape[0], block_rows):
+            block = vectors[start:start + block_rows]
+            assignments[start:start + block_rows] = np.argmax(block @ centroids.T, axis=1)
+        return assignments
+    
+    def _train(self, vectors: np.ndarray, nlist: int) -> np.ndarray:
+        """
+        Train centroids with spherical k-means on a sample of the vectors
+        
+        Args:
+            vectors: Normalized vectors
+            nlist: Number of centroids
+        
+        Returns:
+            Normalized centroid matrix (shape: [nlist, dim])
+        """
+        rng = np.random.default_rng(self.seed)
+        n_rows = vectors.shape[0]
+        
+        sample_size = min(n_rows, nlist * 64)
+        sample = np.asarray(vectors[np.sort(rng.choice(n_rows, sample_size, replace=False))])
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+        
+        for _ in range(self.kmeans_iterations):
+            assignments = self._assign(sample, centroids)
+            
+            order = np.argsort(assignments, kind="stable")
+            sorted_assignments = assignments[order]
+            starts = np.flatnonzero(np.r_[True, np.diff(sorted_assignments) != 0])
+            sums = np.add.reduceat(sample[order], starts, axis=0)
+            
+            new_centroids = centroids.copy()
+            new_centroids[sorted_assignments[starts]] = l2_normalize(sums)
+            
+            # Re-seed empty cells with random sample points
+            empty = np.setdiff1d(np.arange(nlist), sorted_assignments[starts])
+            if empty.size:
+                new_centroids[empty] = sample[rng.choice(sample_size, empty.size, replace=False)]
+            
+            centroids = new_centroids
+        
+        return centroids
+    
+    def build(self, embeddings: np.ndarray):
+        """Train the quantizer and group rows into inverted lists"""
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        vectors = l2_normalize(vectors) if vectors.shape[0] else vectors
+        n_rows = vectors.shape[0]
+        nlist = self._resolve_nlist(n_rows)
+        
+        logger.info(f"Training IVF index: {n_rows} rows, {nlist} cells")
+        self.centroids = self._train(vectors, nlist)
+        
+        assignments = self._assign(vectors, self.centroids)
+        self.list_ids = np.argsort(assignments, kind="stable")
+        self.list_vectors = np.ascontiguousarray(vectors[self.list_ids])
+        counts = np.bincount(assignments, minlength=nlist)
+        self.list_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        self.fingerprint = embeddings_fingerprint(embeddings)
+        
+        logger.info(
+            f"IVF index built: {nlist} cells, "
+            f"largest cell {int(counts.max()) if counts.size else 0} rows"
+        )
+    
+    def search(self, query_embedding: np.ndarray, top_k: int) -> List[Tuple[int, float]]:
+        """Score only the rows of the nprobe closest cells"""
+        if self.centroids is None:
+            raise ValueError("IVF index not built")
+        
+        query = l2_normalize(np.asarray(query_embedding).reshape(-1))
+        probes = select_top_k(self.centroids @ query, self.nprobe)
+        
+        candidate_ids = []
+        candidate_scores = []
+        for cell in probes:
+            start, end = self.list_offsets[cell], self.list_offsets[cell + 1]
+            if start == end:
+                continue
+            candidate_ids.append(self.list_ids[start:end])
+            candidate_scores.append(self.list_vectors[start:end] @ query)
+        
+        if not candidate_ids:
+            return []
+        
+        ids = np.concatenate(candidate_ids)
+        scores = np.concatenate(candidate_scores)
+        top = select_top_k(scores, top_k)
+        return [(int(ids[i]), float(scores[i])) for i in top]
+    
+    def save(self, directory: Path):
+        """Persist centroids and inverted lists as .npy files"""
+        directory = Path(directory)
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            for name in ("centroids", "list_offsets", "list_ids", "list_vectors"):
+                with atomic_open(directory / f"{name}.npy", 'wb') as f:
+                    np.save(f, getattr(self, name))
+            
+            # The metadata file is written last and commits the index
+            meta = {
+                "version": self.FORMAT_VERSION,
+                "nlist": int(self.centroids.shape[0]),
+                "requested_nlist": self.nlist,
+                "kmeans_iterations": self.kmeans_iterations,
+                "fingerprint": self.fingerprint
+            }
+            with atomic_open(directory / "meta.json", 'w') as f:
+                json.dump(meta, f)
+            
+            logger.info(f"Saved IVF index to {directory}")
+        except Exception as e:
+            logger.error(f"Failed to save IVF index: {e}")
+    
+    def load(self, directory: Path, fingerprint: str) -> bool:
+        """Load a persisted index (memory-mapped) if still valid"""
+        directory = Path(directory)
+        meta_path = directory / "meta.json"
+        if not meta_path.exists():
+            return False
+        
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            
+            if meta.get("version") != self.FORMAT_VERSION \
+                    or meta.get("fingerprint") != fingerprint \
+                    or meta.get("requested_nlist") != self.nlist \
+                    or meta.get("kmeans_iterations") != self.kmeans_iterations:
+                logger.info(f"IVF index at {directory} is stale, rebuilding")
+                return False
+            
+            mmap_mode = "r" if settings.embedding_mmap else None
+            self.centroids = np.load(directory / "centroids.npy")
+            self.list_offsets = np.load(directory / "list_offsets.npy")
+            self.list_ids = np.load(directory / "list_ids.npy", mmap_mode=mmap_mode)
+            self.list_vectors = np.load(directory / "list_vectors.npy", mmap_mode=mmap_mode)
+            self.fingerprint = fingerprint
+        except Exception as e:
+            logger.warning(f"Failed to load IVF index from {directory}: {e}")
+            return False
+        
+        logger.info(f"Loaded IVF index from {directory} ({self.centroids.shape[0]} cells)")
+        return True
+    
+    @property
+    def size(self) -> int:
+        """Number of indexed rows"""
+        return 0 if self.list_ids is None else self.list_ids.shape[0]
+
+
+class QuantizedIndex(VectorIndex):
+    """
+    Brute-force search over an int8 copy of the corpus
+    
+    Rows are stored as symmetric int8 with one float32 scale per row
+    (about 4x smaller than float32): scale = max|x| / 127 and
+    x ~ scale * round(x / scale). A query scans the int8 rows in small
+    blocks, each converted into a per-thread float32 scratch buffer that
+    stays in CPU cache, so the scan reads a quarter of the bytes an exact
+    scan does. The best rescore_factor * top_k rows are then rescored
+    exactly against the original float32 matrix, of which only those
+    rows are read.
+    
+    The int8 codes and scales are persisted next to the embedding cache
+    and memory-mapped read-only, so worker processes share one page-cache
+    copy like the embedding matrix itself.
+    """
+    
+    backend = "int8"
+    FORMAT_VERSION = 1
+    BUILD_BLOCK_ROWS = 16384
+    
+    def __init__(self, rescore_factor: int = 4, block_rows: int = 512):
+        """
+        Initialize the index
+        
+        Args:
+            rescore_factor: Shortlist size as a multiple of top_k; 0 returns
+                            the approximate scores without rescoring
+            block_rows: Rows converted to float32 per scoring step (small
+                        enough for the scratch buffer to stay in cache)
+        """
+        self.rescore_factor = rescore_factor
+        self.block_rows = block_rows
+        
+        self.codes = None           # [n, dim] int8
+        self.scales = None          # [n] float32 per-row scales
+        self.embeddings = None      # original matrix, for exact rescoring
+        self.normalized = True
+        self.fingerprint = None
+        self._local = threading.local()
+    
+    def build(self, embeddings: np.ndarray):
+        """Quantize the normalized corpus block by block"""
+        n_rows, dim = embeddings.shape
+        self.embeddings = embeddings
+        self.normalized = True
+        self.codes = np.empty((n_rows, dim), dtype=np.int8)
+        self.scales = np.ones(n_rows, dtype=np.float32)
+        
+        for start in range(0, n_rows, self.BUILD_BLOCK_ROWS):
+            raw = np.asarray(embeddings[start:start + self.BUILD_BLOCK_ROWS], dtype=np.float32)
+            self.normalized = self.normalized and is_normalized(raw)
+            block = l2_normalize(raw)
+            end = start + block.shape[0]
+            
+            scales = np.abs(block).max(axis=1) / 127
+            scales[scales == 0] = 1.0
+            self.codes[start:end] = np.rint(block / scales[:, None])
+            self.scales[start:end] = scales
+        
+        self.fingerprint = embeddings_fingerprint(embeddings)
+        logger.info(f"int8 index built: {n_rows} rows, {self.memory_bytes / 2 ** 20:.1f} MiB scanned per query")
+    
+    def attach(self, embeddings: np.ndarray):
+        """Reference the float32 matrix used for rescoring (after load())"""
+        self.embeddings = embeddings
+    
+    def save(self, directory: Path):
+        """Persist codes and scales as .npy files"""
+        directory = Path(directory)
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            for name in ("codes", "scales"):
+                with atomic_open(directory / f"{name}.npy", 'wb') as f:
+                    np.save(f, getattr(self, name))
+            
+            # The metadata file is written last and commits the index
+            meta = {
+                "version": self.FORMAT_VERSION,
+                "normalized": self.normalized,
+                "fingerprint": self.fingerprint
+            }
+            with atomic_open(directory / "meta.json", 'w') as f:
+                json.dump(meta, f)
+            
+            logger.info(f"Saved int8 index to {directory}")
+        except Exception as e:
+            logger.error(f"Failed to save int8 index: {e}")
+    
+    def load(self, directory: Path, fingerprint: str) -> bool:
+        """Load persisted codes and scales (memory-mapped) if still valid"""
+        directory = Path(directory)
+        meta_path = directory / "meta.json"
+        if not meta_path.exists():
+            return False
+        
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            
+            if meta.get("version") != self.FORMAT_VERSION or meta.get("fingerprint") != fingerprint:
+                logger.info(f"int8 index at {directory} is stale, rebuilding")
+                return False
+            
+            mmap_mode = "r" if settings.embedding_mmap else None
+            self.codes = np.load(directory / "codes.npy", mmap_mode=mmap_mode)
+            self.scales = np.load(directory / "scales.npy", mmap_mode=mmap_mode)
+            self.normalized = bool(meta.get("normalized", False))
+            self.fingerprint = fingerprint
+        except Exception as e:
+            logger.warning(f"Failed to load int8 index from {directory}: {e}")
+            return False
+        
+        logger.info(f"Loaded int8 index from {directory} ({self.codes.shape[0]} rows)")
+        return True
+    
+    @property
+    def memory_bytes(self) -> int:
+        """Bytes of the quantized copy"""
+        if self.codes is None:
+            return 0
+        return self.codes.nbytes + self.scales.nbytes
+    
+    def _scratch(self) -> np.ndarray:
+        """Preallocated float32 block buffer for the calling thread"""
+        scratch = getattr(self._local, "scratch", None)
+        if scratch is None or scratch.shape != (self.block_rows, self.codes.shape[1]):
+            scratch = np.empty((self.block_rows, self.codes.shape[1]), dtype=np.float32)
+            self._local.scratch = scratch
+        return scratch
+    
+    def _approximate_scores(self, queries: np.ndarray) -> np.ndarray:
+        """
+        Approximate cosine similarities of normalized queries to every row
+        
+        Args:
+            queries: Normalized query matrix (shape: [n_queries, dim])
+        
+        Returns:
+            Score matrix (shape: [n_rows, n_queries])
+        """
+        n_rows = self.codes.shape[0]
+        scores = np.empty((n_rows, queries.shape[0]), dtype=np.float32)
+        scratch = self._scratch()
+        queries_t = np.ascontiguousarray(queries.T, dtype=np.float32)
+        
+        for start in range(0, n_rows, self.block_rows):
+            end = min(start + self.block_rows, n_rows)
+            block = scratch[:end - start]
+            np.copyto(block, self.codes[start:end], casting="unsafe")
+            np.dot(block, queries_t, out=scores[start:end])
+            scores[start:end] *= self.scales[start:end, None]
+        return scores
+    
+    def _rescore(self, query: np.ndarray, scores: np.ndarray, top_k: int) -> List[Tuple[int, float]]:
+        """Exact float32 top-k among the best approximate rows"""
+        if self.rescore_factor <= 0:
+            top = select_top_k(scores, top_k)
+            return [(int(idx), float(scores[idx])) for idx in top]
+        
+        # Sorted rows keep reads from a memory-mapped matrix sequential
+        shortlist = np.sort(select_top_k(scores, top_k * self.rescore_factor))
+        vectors = np.asarray(self.embeddings[shortlist], dtype=np.float32)
+        if not self.normalized:
+            vectors = l2_normalize(vectors)
+        exact = vectors @ query
+        top = select_top_k(exact, top_k)
+        return [(int(shortlist[i]), float(exact[i])) for i in top]
+    
+    def search(self, query_embedding: np.ndarray, top_k: int) -> List[Tuple[int, float]]:
+        """Scan the int8 rows, then rescore the shortlist exactly"""
+        if self.codes is None:
+            raise ValueError("int8 index not built")
+        
+        query = l2_normalize(np.asarray(query_embedding).reshape(-1))
+        scores = self._approximate_scores(query[None, :])[:, 0]
+        return self._rescore(query, scores, top_k)
+    
+    def search_batch(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: int
+    ) -> List[List[Tuple[int, float]]]:
+        """Scan the int8 rows for all queries at once, then rescore each"""
+        if self.codes is None:
+            raise ValueError("int8 index not built")
+        
+        queries = l2_normalize(np.atleast_2d(query_embeddings))
+        scores = self._approximate_scores(queries)
+        return [self._rescore(query, scores[:, i], top_k) for i, query in enumerate(queries)]
+    
+    @property
+    def size(self) -> int:
+        """Number of indexed rows"""
+        return 0 if self.codes is None else self.codes.shape[0]
+
+
+def embeddings_fingerprint(embeddings: np.ndarray) -> str:
+    """
+    Content fingerprint of an embedding matrix
+    
+    Args:
+        embeddings: Embedding matrix
+    
+    Returns:
+        Hex digest of the matrix shape and contents
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(embeddings.shape).encode("utf-8"))
+    digest.update(np.ascontiguousarray(embeddings, dtype=np.float32).data)
+    return digest.hexdigest()
+
+
+def create_index(backend: Optional[str] = None, n_rows: Optional[int] = None) -> VectorIndex:
+    """
+    Create a vector index for the configured backend
+    
+    Args:
+        backend: 'exact', 'ivf' or 'int8' (default: settings.ann_backend)
+        n_rows: Corpus size; corpora smaller than settings.ann_min_rows
+                always use the exact index
+    
+    Returns:
+        Unbuilt VectorIndex instance
+    """
+    backend = (backend or settings.ann_backend).lower()
+    
+    if backend == "exact" or (n_rows is not None and n_rows < settings.ann_min_rows):
+        return ExactIndex()
+    if backend == "ivf":
+        return IVFIndex(
+            nlist=settings.ivf_nlist,
+            nprobe=settings.ivf_nprobe,
+            kmeans_iterations=settings.ivf_kmeans_iterations
+        )
+    if backend == "int8":
+        return QuantizedIndex(rescore_factor=settings.quantization_rescore_factor)
+    
+    raise ValueError(f"Unknown vector index backend: {backend}")
+
+
+def build_or_load_index(name: str, embeddings: np.ndarray) -> VectorIndex:
+    """
+    Create the configured index for a corpus, reusing a persisted one when valid
+    
+    Args:
+        name: Corpus name (e.g. 'icd11'), used for the on-disk location
+        embeddings: Corpus embeddings
+    
+    Returns:
+        Built VectorIndex
+    """
+    index = create_index(n_rows=embeddings.shape[0])
+    directory = Path(settings.embedding_cache_dir) / f"{name}_{index.backend}"
+    
+    # The exact index has no state worth persisting
+    if isinstance(index, ExactIndex):
+        index.build(embeddings)
+        return index
+    
+    fingerprint = embeddings_fingerprint(embeddings)
+    if not index.load(directory, fingerprint):
+        index.build(embeddings)
+        index.save(directory)
+        # Reopen the saved arrays memory-mapped so this worker shares them too
+        index.load(directory, fingerprint)
+    if isinstance(index, QuantizedIndex):
+        index.attach(embeddings)
+    
+    return index
@@ -0,0 +1,216 @@
+"""
+Dynamic micro-batching of concurrent embedding requests
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional
+import numpy as np
+
+from app.config import settings
+from app.models.embedder import MedicalEmbedder, embedder
+from app.utils.executor import inference_executor
+from app.utils.logger import logger
+
+
+# Upper bounds of the batch-size histogram buckets
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128]
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent single-text encode requests into batched model calls
+    
+    Requests are queued; a background task takes the first waiting request,
+    keeps collecting until the batch window elapses or the batch is full,
+    encodes all texts with one embedder call on the inference executor and
+    resolves each caller's future with its own row. While a batch is being
+    encoded, new requests keep queueing and form the next batch.
+    """
+    
+    def __init__(
+        self,
+        model: MedicalEmbedder,
+        window_ms: float = 3.0,
+        max_batch_size: int = 64
+    ):
+        """
+        Initialize the batcher
+        
+        Args:
+            model: Embedder used for the batched calls
+            window_ms: Maximum time to wait for more requests after the first
+            max_batch_size: Maximum number of texts per model call
+        """
+        self.model = model
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        
+        # Metrics
+        self.requests_total = 0
+        self.batches_total = 0
+        self.max_queue_depth = 0
+        self.batch_size_histogram = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+        self.queue_wait_ms_total = 0.0
+    
+    @property
+    def is_running(self) -> bool:
+        """Whether the background batching task is active"""
+        return self._task is not None and not self._task.done()
+    
+    def start(self):
+        """Start the background batching task on the running event loop"""
+        if self.is_running:
+            return
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        logger.info(
+            f"Embedding batcher started (window {self.window * 1000:.1f}ms, "
+            f"max batch {self.max_batch_size})"
+        )
+    
+    async def stop(self):
+        """Stop the background task, failing the in-flight batch and any queued requests"""
+        if not self.is_running:
+            return
+        
+        # The task fails the batch it is collecting or encoding when cancelled
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        
+        queued = []
+        while not self._queue.empty():
+            queued.append(self._queue.get_nowait())
+        self._fail(queued, RuntimeError("Embedding batcher stopped"))
+        
+        self._task = None
+        logger.info("Embedding batcher stopped")
+    
+    async def encode(self, text: str) -> np.ndarray:
+        """
+        Encode a single text, batched with other concurrent requests
+        
+        Falls back to a direct model call when the batcher is not running.
+        
+        Args:
+            text: Preprocessed text
+        
+        Returns:
+            Embedding vector (shape: [embedding_dim])
+        """
+        if not self.is_running:
+            embeddings = await inference_executor.run(self.model.encode, text)
+            return embeddings[0]
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future, time.perf_counter()))
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+        return await future
+    
+    async def _run(self):
+        """Collect and encode batches until cancelled"""
+        loop = asyncio.get_running_loop()
+        batch = []
+        
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                deadline = loop.time() + self.window
+                
+                while len(batch) < self.max_batch_size:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                
+                await self._encode_batch(batch)
+        except asyncio.CancelledError:
+            # Requests already taken off the queue would otherwise wait forever
+            self._fail(batch, RuntimeError("Embedding batcher stopped"))
+            raise
+    
+    @staticmethod
+    def _fail(batch: List[tuple], error: Exception):
+        """Fail the unresolved futures of (text, future, enqueue_time) tuples"""
+        for _, future, _ in batch:
+            if not future.done():
+                future.set_exception(error)
+    
+    async def _encode_batch(self, batch: List[tuple]):
+        """
+        Encode one batch and resolve the waiting futures
+        
+        Args:
+            batch: List of (text, future, enqueue_time) tuples
+        """
+        now = time.perf_counter()
+        self._record(batch, now)
+        
+        # Identical texts in one batch are encoded once
+        unique_texts = list(dict.fromkeys(text for text, _, _ in batch))
+        
+        try:
+            embeddings = await inference_executor.run_admitted(
+                self.model.encode, unique_texts, batch_size=len(unique_texts)
+            )
+        except Exception as e:
+            logger.error(f"Batched encoding of {len(batch)} texts failed: {e}")
+            self._fail(batch, e)
+            return
+        
+        # Copies, so a cached row does not keep the whole batch matrix alive
+        rows = {text: row for row, text in enumerate(unique_texts)}
+        for text, future, _ in batch:
+            if not future.done():
+                future.set_result(embeddings[rows[text]].copy())
+    
+    def _record(self, batch: List[tuple], now: float):
+        """Update metrics for a batch that is about to be encoded"""
+        self.requests_total += len(batch)
+        self.batches_total += 1
+        self.queue_wait_ms_total += sum(now - enqueued for _, _, enqueued in batch) * 1000
+        
+        for i, bound in enumerate(BATCH_SIZE_BUCKETS):
+            if len(batch) <= bound:
+                self.batch_size_histogram[i] += 1
+                break
+        else:
+            self.batch_size_histogram[-1] += 1
+    
+    def get_stats(self) -> Dict:
+        """
+        Get batching statistics
+        
+        Returns:
+            Dictionary with queue depth, batch counts and batch-size histogram
+        """
+        labels = [f"<={bound}" for bound in BATCH_SIZE_BUCKETS] + [f">{BATCH_SIZE_BUCKETS[-1]}"]
+        return {
+            "enabled": self.is_running,
+            "window_ms": self.window * 1000,
+            "max_batch_size": self.max_batch_size,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue_depth": self.max_queue_depth,
+            "requests_total": self.requests_total,
+            "batches_total": self.batches_total,
+            "avg_batch_size": round(self.requests_total / self.batches_total, 2) if self.batches_total else 0.0,
+            "avg_queue_wait_ms": round(self.queue_wait_ms_total / self.requests_total, 3) if self.requests_total else 0.0,
+            "batch_size_histogram": dict(zip(labels, self.batch_size_histogram))
+        }
+
+
+# Global batcher instance
+embedding_batcher = EmbeddingBatcher(
+    embedder,
+    window_ms=settings.batch_window_ms,
+    max_batch_size=settings.batch_max_size
+)
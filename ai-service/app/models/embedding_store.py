@@ -0,0 +1,229 @@
+"""
+Content-addressed on-disk store for corpus embeddings
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import numpy as np
+
+from app.config import settings
+from app.models.scoring import l2_normalize
+from app.utils.files import atomic_open
+from app.utils.logger import logger
+
+
+class EmbeddingStore:
+    """
+    Persists corpus embeddings with a versioned manifest
+    
+    The manifest records the embedding model, the embedding dimension, the
+    preprocessor fingerprint and a content hash per row. A change to any of
+    the first three invalidates the whole cache; otherwise only rows whose
+    content hash is new are preprocessed and re-encoded.
+    
+    The matrix is written under a content-derived file name and the manifest
+    is replaced atomically afterwards, so readers never observe a manifest
+    that points at a partially written matrix.
+    
+    Rows are stored L2-normalized, so cosine scoring can use the mapped
+    matrix directly without a private normalized copy.
+    
+    Matrices are stored as .npy files (flat, C-contiguous float32 with a
+    64-byte aligned header) and, when memory mapping is enabled, opened
+    read-only with mmap so every worker process on a node shares a single
+    page-cache copy instead of holding its own.
+    """
+    
+    MANIFEST_VERSION = 2
+    
+    def __init__(
+        self,
+        name: str,
+        model_name: str,
+        preprocessor_fingerprint: str,
+        cache_dir: Optional[str] = None
+    ):
+        """
+        Initialize the store
+        
+        Args:
+            name: Corpus name, used as the file name prefix (e.g. 'icd11')
+            model_name: Embedding model identifier
+            preprocessor_fingerprint: Fingerprint of the preprocessing pipeline
+            cache_dir: Directory holding the cache files (default: from settings)
+        """
+        self.name = name
+        self.model_name = model_name
+        self.preprocessor_fingerprint = preprocessor_fingerprint
+        self.cache_dir = Path(cache_dir or settings.embedding_cache_dir)
+        self.mmap_mode = "r" if settings.embedding_mmap else None
+    
+    @property
+    def manifest_path(self) -> Path:
+        """Path of the cache manifest"""
+        return self.cache_dir / f"{self.name}_embeddings.manifest.json"
+    
+    @staticmethod
+    def row_key(text: str) -> str:
+        """
+        Compute the content hash for a single row
+        
+        Args:
+            text: Raw (unpreprocessed) text that gets embedded
+        
+        Returns:
+            Hex digest of the row content
+        """
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+    
+    def _read(self) -> Optional[tuple]:
+        """
+        Read the cached matrix and validate it against the manifest
+        
+        Returns:
+            (matrix, {key: row}) tuple, or None if no usable cache exists
+        """
+        if not self.manifest_path.exists():
+            return None
+        
+        try:
+            with open(self.manifest_path, 'r') as f:
+                manifest = json.load(f)
+        except Exception as e:
+            logger.warning(f"Failed to read {self.name} embedding manifest: {e}")
+            return None
+        
+        if manifest.get("version") != self.MANIFEST_VERSION:
+            logger.info(f"{self.name} embedding cache has an old manifest version, rebuilding")
+            return None
+        if manifest.get("model_name") != self.model_name:
+            logger.info(
+                f"{self.name} embedding cache was built with model "
+                f"'{manifest.get('model_name')}', rebuilding"
+            )
+            return None
+        if manifest.get("preprocessor_fingerprint") != self.preprocessor_fingerprint:
+            logger.info(f"{self.name} embedding cache preprocessor fingerprint changed, rebuilding")
+            return None
+        
+        try:
+            matrix = np.load(self.cache_dir / manifest["matrix_file"], mmap_mode=self.mmap_mode)
+        except Exception as e:
+            logger.warning(f"Failed to read {self.name} embedding matrix: {e}")
+            return None
+        
+        rows = manifest.get("rows", [])
+        if matrix.ndim != 2 or matrix.shape != (len(rows), manifest.get("embedding_dim")):
+            logger.warning(f"Ignoring inconsistent {self.name} embedding cache")
+            return None
+        
+        return matrix, {key: row for row, key in enumerate(rows)}
+    
+    def _write(self, matrix: np.ndarray, keys: List[str]) -> Optional[Path]:
+        """
+        Persist the matrix and commit it by atomically replacing the manifest
+        
+        Args:
+            matrix: Embedding matrix in row order of keys
+            keys: Row keys
+            
+        Returns:
+            Path of the written matrix, or None if saving failed
+        """
+        digest = hashlib.sha256(
+            "\x1f".join([self.model_name, self.preprocessor_fingerprint] + keys).encode("utf-8")
+        ).hexdigest()[:16]
+        matrix_file = f"{self.name}_embeddings.{digest}.npy"
+        
+        manifest = {
+            "version": self.MANIFEST_VERSION,
+            "model_name": self.model_name,
+            "embedding_dim": int(matrix.shape[1]),
+            "preprocessor_fingerprint": self.preprocessor_fingerprint,
+            "matrix_file": matrix_file,
+            "rows": keys
+        }
+        
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            
+            with atomic_open(self.cache_dir / matrix_file, 'wb') as f:
+                np.save(f, matrix)
+            with atomic_open(self.manifest_path, 'w') as f:
+                json.dump(manifest, f)
+            
+            # Drop matrices no longer referenced by the manifest
+            for stale in self.cache_dir.glob(f"{self.name}_embeddings.*.npy"):
+                if stale.name != matrix_file:
+                    stale.unlink(missing_ok=True)
+            
+            logger.info(f"Saved {len(keys)} {self.name} embeddings to {matrix_file}")
+            return self.cache_dir / matrix_file
+        except Exception as e:
+            logger.error(f"Failed to save {self.name} embedding cache: {e}")
+            return None
+    
+    def load_or_encode(
+        self,
+        texts: List[str],
+        encode_fn: Callable[[List[str]], np.ndarray]
+    ) -> np.ndarray:
+        """
+        Return embeddings for texts, encoding only rows missing from the cache
+        
+        Args:
+            texts: Raw texts, one per corpus row
+            encode_fn: Callable that preprocesses and encodes a list of raw texts
+        
+        Returns:
+            L2-normalized float32 embedding matrix (shape: [len(texts), embedding_dim]),
+            memory-mapped read-only when mmap is enabled
+        """
+        keys = [self.row_key(text) for text in texts]
+        
+        cached = self._read()
+        cached_matrix, cached_rows = cached if cached else (None, {})
+        
+        hits: Dict[int, int] = {}
+        missing: List[int] = []
+        for i, key in enumerate(keys):
+            if key in cached_rows:
+                hits[i] = cached_rows[key]
+            else:
+                missing.append(i)
+        
+        logger.info(
+            f"{self.name} embedding cache: {len(hits)} hits, {len(missing)} to encode"
+        )
+        
+        if not missing and cached_matrix is not None and cached_matrix.shape[0] == len(keys) \
+                and all(hits[i] == i for i in range(len(keys))):
+            return cached_matrix.astype(np.float32, copy=False)
+        
+        encoded = None
+        if missing:
+            encoded = l2_normalize(encode_fn([texts[i] for i in missing]))
+        
+        if encoded is not None:
+            dim = encoded.shape[1]
+        elif cached_matrix is not None:
+            dim = cached_matrix.shape[1]
+        else:
+            dim = settings.embedding_dim
+        
+        matrix = np.empty((len(keys), dim), dtype=np.float32)
+        if hits:
+            rows = np.fromiter(hits.keys(), dtype=np.int64, count=len(hits))
+            sources = np.fromiter(hits.values(), dtype=np.int64, count=len(hits))
+            matrix[rows] = cached_matrix[sources]
+        if missing:
+            matrix[np.asarray(missing, dtype=np.int64)] = encoded
+        
+        matrix_path = self._write(matrix, keys)
+        if matrix_path is not None and self.mmap_mode:
+            # Swap the private copy for the shared mapping of the file just written
+            return np.load(matrix_path, mmap_mode=self.mmap_mode)
+        return matrix
+
@@ -0,0 +1,180 @@
+"""
+In-memory index of doctor feedback for re-ranking ICD-11 suggestions
+"""
+
+import hashlib
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+from app.config import settings
+
+
+class FeedbackIndex:
+    """
+    Accept/reject counts per (NAMASTE code, ICD-11 code) pair
+    
+    Built from the feedback log at startup and updated in place on every
+    /feedback submission. A rejected suggestion that names the correct code
+    counts as a rejection of the suggestion and an acceptance of the
+    correction.
+    
+    Each pair gets a score adjustment of
+    
+        boost * (accepts - rejects) / (accepts + rejects + prior)
+    
+    so a single vote moves a suggestion a little and a consistent history
+    approaches +/- boost. A pair is "established" once it has at least
+    min_accepts acceptances and an acceptance rate of at least min_ratio;
+    established codes are listed first when a known NAMASTE code is mapped
+    without symptoms.
+    """
+    
+    def __init__(
+        self,
+        boost: float = 0.15,
+        prior: float = 2.0,
+        min_accepts: int = 5,
+        min_ratio: float = 0.9
+    ):
+        """
+        Initialize an empty index
+        
+        Args:
+            boost: Largest score change feedback can apply
+            prior: Pseudo-count damping the adjustment for few votes
+            min_accepts: Acceptances needed for an established pair
+            min_ratio: Acceptance rate needed for an established pair
+        """
+        self.boost = boost
+        self.prior = prior
+        self.min_accepts = min_accepts
+        self.min_ratio = min_ratio
+        
+        self._counts: Dict[str, Dict[str, Tuple[int, int]]] = {}
+        self._lock = threading.Lock()
+        self.records_total = 0
+    
+    def load(self, records: Iterable[Dict]):
+        """
+        Rebuild the index from stored feedback records
+        
+        Args:
+            records: Feedback record dictionaries
+        """
+        with self._lock:
+            self._counts = {}
+            self.records_total = 0
+        for record in records:
+            self.add(record)
+    
+    def add(self, record: Dict):
+        """
+        Count one feedback record
+        
+        Args:
+            record: Feedback record with namaste_code, suggested_icd_code,
+                    accepted and optional correct_icd_code
+        """
+        namaste_code = record.get('namaste_code')
+        suggested = record.get('suggested_icd_code')
+        if not namaste_code or not suggested:
+            return
+        
+        with self._lock:
+            pairs = self._counts.setdefault(namaste_code, {})
+            if record.get('accepted'):
+                self._increment(pairs, suggested, accepts=1)
+            else:
+                self._increment(pairs, suggested, rejects=1)
+                correct = record.get('correct_icd_code')
+                if correct and correct != suggested:
+                    self._increment(pairs, correct, accepts=1)
+            self.records_total += 1
+    
+    @staticmethod
+    def _increment(pairs: Dict[str, Tuple[int, int]], icd_code: str, accepts: int = 0, rejects: int = 0):
+        """Add votes to one pair"""
+        old_accepts, old_rejects = pairs.get(icd_code, (0, 0))
+        pairs[icd_code] = (old_accepts + accepts, old_rejects + rejects)
+    
+    def code_version(self, namaste_code: str) -> str:
+        """
+        Digest of the votes recorded for a NAMASTE code
+        
+        Derived from the (ICD-11 code, accepts, rejects) counts themselves,
+        so workers holding the same votes produce the same version and
+        cached results shared between them (e.g. in Redis) stay consistent.
+        
+        Returns:
+            Short hex digest, or an empty string if the code has no votes
+        """
+        pairs = self.pairs(namaste_code)
+        if not pairs:
+            return ""
+        return hashlib.blake2b(repr(sorted(pairs.items())).encode("utf-8"), digest_size=8).hexdigest()
+    
+    def pairs(self, namaste_code: str) -> Dict[str, Tuple[int, int]]:
+        """
+        Votes recorded for a NAMASTE code
+        
+        Args:
+            namaste_code: NAMASTE code
+        
+        Returns:
+            Dictionary of ICD-11 code -> (accepts, rejects)
+        """
+        with self._lock:
+            return dict(self._counts.get(namaste_code, {}))
+    
+    def adjustment(self, accepts: int, rejects: int) -> float:
+        """Score change for a pair with the given votes"""
+        return self.boost * (accepts - rejects) / (accepts + rejects + self.prior)
+    
+    def established(self, namaste_code: str) -> List[Tuple[str, float]]:
+        """
+        Well-established ICD-11 mappings for a NAMASTE code
+        
+        Args:
+            namaste_code: NAMASTE code
+        
+        Returns:
+            List of (ICD-11 code, acceptance rate) tuples, best first, with the
+            rate Laplace-smoothed ((accepts + 1) / (votes + 2)); empty if no
+            pair is established
+        """
+        if not namaste_code:
+            return []
+        
+        results = []
+        for icd_code, (accepts, rejects) in self.pairs(namaste_code).items():
+            total = accepts + rejects
+            if accepts >= self.min_accepts and accepts / total >= self.min_ratio:
+                results.append((icd_code, (accepts + 1) / (total + 2)))
+        
+        results.sort(key=lambda item: -item[1])
+        return results
+    
+    def get_stats(self) -> Dict:
+        """
+        Get feedback index statistics
+        
+        Returns:
+            Dictionary with record and pair counts
+        """
+        with self._lock:
+            pair_count = sum(len(pairs) for pairs in self._counts.values())
+            namaste_count = len(self._counts)
+        return {
+            "records": self.records_total,
+            "namaste_codes": namaste_count,
+            "pairs": pair_count
+        }
+
+
+# Global feedback index instance
+feedback_index = FeedbackIndex(
+    boost=settings.feedback_boost,
+    prior=settings.feedback_prior,
+    min_accepts=settings.feedback_shortcut_min_accepts,
+    min_ratio=settings.feedback_shortcut_min_ratio
+)
@@ -2,10 +2,13 @@
 Similarity-based mapper for NAMASTE to ICD-11 code matching
 """
 
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 from app.config import settings
+from app.models.ann_index import ExactIndex, build_or_load_index
+from app.models.feedback_index import feedback_index
+from app.models.mapping_table import MappingTable
+from app.models.scoring import l2_normalize
 from app.utils.logger import logger
 
 
@@ -18,6 +21,9 @@ class SimilarityMapper:
         """Initialize the mapper"""
         self.icd11_embeddings = None
         self.icd11_codes = None
+        self.icd11_rows = {}
+        self.index = ExactIndex()
+        self.mapping_table = None
         self.top_k = settings.top_k_results
         self.high_threshold = settings.high_confidence_threshold
         self.medium_threshold = settings.medium_confidence_threshold
@@ -30,13 +36,24 @@ class SimilarityMapper:
         """
         Load pre-computed ICD-11 embeddings
         
+        The array is referenced, not copied, so a read-only memory map from
+        the embedding store stays shared with other worker processes.
+        
         Args:
-            embeddings: numpy array of ICD-11 embeddings
+            embeddings: numpy array (or np.memmap) of ICD-11 embeddings
             codes: List of ICD-11 code dictionaries
         """
         self.icd11_embeddings = embeddings
         self.icd11_codes = codes
-        logger.info(f"Loaded {len(codes)} ICD-11 code embeddings")
+        self.icd11_rows = {}
+        for row, code in enumerate(codes):
+            self.icd11_rows.setdefault(code["code"], row)
+        self.index = build_or_load_index("icd11", embeddings)
+        logger.info(
+            f"Loaded {len(codes)} ICD-11 code embeddings"
+            f"{' (memory-mapped)' if isinstance(embeddings, np.memmap) else ''}, "
+            f"{self.index.backend} index"
+        )
     
     def compute_similarity(
         self,
@@ -44,7 +61,7 @@ class SimilarityMapper:
         top_k: int = None
     ) -> List[Tuple[int, float]]:
         """
-        Compute cosine similarity between query and all ICD-11 codes
+        Compute cosine similarity between query and the closest ICD-11 codes
         
         Args:
             query_embedding: Query embedding vector
@@ -59,23 +76,11 @@ class SimilarityMapper:
         if top_k is None:
             top_k = self.top_k
         
-        # Reshape query if needed
-        if query_embedding.ndim == 1:
-            query_embedding = query_embedding.reshape(1, -1)
-        
-        # Compute cosine similarity
-        similarities = cosine_similarity(
-            query_embedding,
-            self.icd11_embeddings
-        )[0]
+        # Exact or approximate search, depending on the configured index backend
+        results = self.index.search(query_embedding, top_k)
         
-        # Get top-k indices
-        top_indices = np.argsort(similarities)[::-1][:top_k]
-        
-        # Return (index, score) pairs
-        results = [(int(idx), float(similarities[idx])) for idx in top_indices]
-        
-        logger.debug(f"Computed similarities, top score: {results[0][1]:.4f}")
+        if results:
+            logger.debug(f"Computed similarities, top score: {results[0][1]:.4f}")
         return results
     
     def get_confidence_level(self, similarity: float) -> str:
@@ -104,18 +109,284 @@ class SimilarityMapper:
         """
         Map NAMASTE query to ICD-11 codes
         
+        When doctors have given feedback on this NAMASTE code, confirmed
+        ICD-11 codes are boosted and rejected ones demoted (see FeedbackIndex).
+        
         Args:
             query_embedding: Embedding of NAMASTE disease description
-            namaste_code: Original NAMASTE code (for logging)
+            namaste_code: Original NAMASTE code (for feedback and logging)
             top_k: Number of suggestions to return
             
         Returns:
             List of ICD-11 suggestions with confidence scores
         """
-        # Get similarity scores
-        similarities = self.compute_similarity(query_embedding, top_k)
+        if top_k is None:
+            top_k = self.top_k
+        
+        votes = self._feedback_votes(namaste_code)
+        if votes:
+            # Extra candidates so demoted codes can be replaced
+            similarities = self.compute_similarity(query_embedding, top_k + settings.feedback_candidates)
+            similarities = self._apply_feedback(query_embedding, similarities, votes, top_k)
+        else:
+            similarities = self.compute_similarity(query_embedding, top_k)
         
         # Build suggestions
+        suggestions = self._build_suggestions(similarities)
+        
+        top_match = (
+            f"Top match: {suggestions[0]['icd_code']} ({suggestions[0]['confidence']:.4f})"
+            if suggestions else "No matches"
+        )
+        logger.info(f"Mapped NAMASTE code '{namaste_code}' to {len(suggestions)} ICD-11 codes. {top_match}")
+        
+        return suggestions
+    
+    def map_from_feedback(
+        self,
+        namaste_row: int,
+        namaste_embedding: np.ndarray,
+        namaste_code: str,
+        top_k: int = None
+    ) -> Optional[List[Dict]]:
+        """
+        Map a known NAMASTE code with established feedback, without embedding
+        
+        Established ICD-11 codes come first (highest acceptance rate first).
+        The remaining slots are filled with the code's other feedback-adjusted
+        matches from the precomputed table, or from the index with the code's
+        stored embedding as the query. Confidence is the same
+        feedback-adjusted similarity map_to_icd11 reports; established codes
+        also carry their smoothed acceptance rate as acceptance_rate.
+        
+        Args:
+            namaste_row: Row of the code in the NAMASTE dataset
+            namaste_embedding: Stored embedding of that row
+            namaste_code: NAMASTE code
+            top_k: Number of suggestions to return
+            
+        Returns:
+            List of ICD-11 suggestions, or None if the code has no
+            established mappings
+        """
+        if not settings.feedback_rerank_enabled or self.icd11_codes is None:
+            return None
+        
+        if top_k is None:
+            top_k = self.top_k
+        
+        established = [
+            (self.icd11_rows[icd_code], rate)
+            for icd_code, rate in feedback_index.established(namaste_code)
+            if icd_code in self.icd11_rows
+        ][:top_k]
+        if not established:
+            return None
+        
+        search_k = top_k + settings.feedback_candidates
+        similarities = None
+        if self.mapping_table is not None and self.mapping_table.k >= top_k:
+            similarities = self._lookup_table(namaste_row, namaste_embedding, min(search_k, self.mapping_table.k))
+        if similarities is None:
+            similarities = self.compute_similarity(namaste_embedding, search_k)
+        
+        # Established codes have more accepts than rejects, so they are always scored
+        votes = self._feedback_votes(namaste_code)
+        adjusted = dict(self._apply_feedback(namaste_embedding, similarities, votes, len(similarities) + len(votes)))
+        established_rows = {row for row, _ in established}
+        ranked = [(row, adjusted[row]) for row, _ in established]
+        ranked += [
+            (row, score) for row, score in adjusted.items() if row not in established_rows
+        ][:top_k - len(ranked)]
+        
+        suggestions = self._build_suggestions(ranked)
+        for suggestion, (_, rate) in zip(suggestions, established):
+            suggestion["acceptance_rate"] = round(rate, 4)
+        
+        logger.info(f"Mapped NAMASTE code '{namaste_code}' from established feedback")
+        return suggestions
+    
+    def load_mapping_table(self, table: MappingTable):
+        """
+        Use a precomputed NAMASTE to ICD-11 table for known codes
+        
+        Args:
+            table: Mapping table built from the loaded ICD-11 embeddings
+        """
+        self.mapping_table = table
+    
+    def map_from_table(
+        self,
+        namaste_row: int,
+        namaste_embedding: np.ndarray,
+        namaste_code: str = None,
+        top_k: int = None
+    ) -> Optional[List[Dict]]:
+        """
+        Map a known NAMASTE code from the precomputed table, without embedding
+        
+        Feedback for the code is applied as in map_to_icd11, with the code's
+        stored embedding as the query.
+        
+        Args:
+            namaste_row: Row of the code in the NAMASTE dataset
+            namaste_embedding: Stored embedding of that row
+            namaste_code: NAMASTE code (for feedback and logging)
+            top_k: Number of suggestions to return
+            
+        Returns:
+            List of ICD-11 suggestions, or None if no table is loaded or it
+            stores fewer than top_k matches per code
+        """
+        if self.mapping_table is None:
+            return None
+        
+        if top_k is None:
+            top_k = self.top_k
+        
+        votes = self._feedback_votes(namaste_code)
+        k = max(top_k, self.mapping_table.k) if votes else top_k
+        similarities = self._lookup_table(namaste_row, namaste_embedding, k)
+        if similarities is None:
+            return None
+        if votes:
+            similarities = self._apply_feedback(namaste_embedding, similarities, votes, top_k)
+        
+        logger.info(f"Mapped NAMASTE code '{namaste_code}' from the precomputed table")
+        return self._build_suggestions(similarities)
+    
+    def _lookup_table(
+        self,
+        namaste_row: int,
+        namaste_embedding: np.ndarray,
+        top_k: int
+    ) -> Optional[List[Tuple[int, float]]]:
+        """
+        Table candidates of a NAMASTE row, rescored exactly
+        
+        The table's float16 scores can land on the other side of a
+        confidence threshold than the float32 similarity, so the table only
+        picks the candidates and their similarity to the stored embedding
+        is recomputed (top_k dot products).
+        
+        Args:
+            namaste_row: Row of the code in the NAMASTE dataset
+            namaste_embedding: Stored embedding of that row
+            top_k: Number of candidates
+            
+        Returns:
+            List of (ICD-11 row, similarity) tuples, best first, or None if
+            the table stores fewer than top_k matches
+        """
+        candidates = self.mapping_table.lookup(namaste_row, top_k)
+        if candidates is None:
+            return None
+        
+        rows = [row for row, _ in candidates]
+        scores = self._score_rows(namaste_embedding, rows)
+        return sorted(zip(rows, scores.tolist()), key=lambda item: -item[1])
+    
+    def _score_rows(self, query_embedding: np.ndarray, rows: List[int]) -> np.ndarray:
+        """Exact cosine similarity between a query and selected ICD-11 rows"""
+        query = l2_normalize(np.asarray(query_embedding, dtype=np.float32).reshape(-1))
+        return l2_normalize(np.asarray(self.icd11_embeddings[rows], dtype=np.float32)) @ query
+    
+    def map_batch_to_icd11(
+        self,
+        query_embeddings: np.ndarray,
+        top_ks: List[int],
+        namaste_codes: Optional[List[str]] = None
+    ) -> List[List[Dict]]:
+        """
+        Map several NAMASTE queries to ICD-11 codes at once
+        
+        All queries are scored together (a single matrix-matrix product for
+        exact search) and each result list is cut to its own top_k. Queries
+        whose NAMASTE code has feedback are re-ranked as in map_to_icd11.
+        
+        Args:
+            query_embeddings: Query embedding matrix (shape: [n_queries, dim])
+            top_ks: Number of suggestions to return for each query
+            namaste_codes: Optional NAMASTE code of each query
+            
+        Returns:
+            One list of ICD-11 suggestions per query
+        """
+        if self.icd11_embeddings is None:
+            raise ValueError("ICD-11 embeddings not loaded")
+        
+        all_votes = [self._feedback_votes(code) for code in namaste_codes or [None] * len(top_ks)]
+        search_k = max(top_ks) + (settings.feedback_candidates if any(all_votes) else 0)
+        batch_results = self.index.search_batch(query_embeddings, search_k)
+        
+        suggestions = []
+        for query_embedding, similarities, top_k, votes in zip(query_embeddings, batch_results, top_ks, all_votes):
+            if votes:
+                similarities = self._apply_feedback(query_embedding, similarities, votes, top_k)
+            suggestions.append(self._build_suggestions(similarities[:top_k]))
+        
+        logger.info(f"Mapped batch of {len(suggestions)} NAMASTE queries to ICD-11 codes")
+        return suggestions
+    
+    def _feedback_votes(self, namaste_code: Optional[str]) -> Dict[str, Tuple[int, int]]:
+        """Feedback votes for a NAMASTE code, empty when re-ranking is off"""
+        if not settings.feedback_rerank_enabled or not namaste_code:
+            return {}
+        return feedback_index.pairs(namaste_code)
+    
+    def _apply_feedback(
+        self,
+        query_embedding: np.ndarray,
+        similarities: List[Tuple[int, float]],
+        votes: Dict[str, Tuple[int, int]],
+        top_k: int
+    ) -> List[Tuple[int, float]]:
+        """
+        Re-rank candidates by feedback
+        
+        Confirmed codes missing from the candidates are scored directly, so
+        a doctor-approved mapping can enter the results.
+        
+        Args:
+            query_embedding: Query vector
+            similarities: Candidate (row, similarity) tuples
+            votes: ICD-11 code -> (accepts, rejects) for the NAMASTE code
+            top_k: Number of results
+            
+        Returns:
+            Top-k (row, adjusted score) tuples, best first; scores are
+            clipped to [0, 1]
+        """
+        candidates = dict(similarities)
+        missing = [
+            self.icd11_rows[icd_code]
+            for icd_code, (accepts, rejects) in votes.items()
+            if accepts > rejects and icd_code in self.icd11_rows
+            and self.icd11_rows[icd_code] not in candidates
+        ]
+        if missing:
+            candidates.update(zip(missing, self._score_rows(query_embedding, missing).tolist()))
+        
+        adjusted = []
+        for row, score in candidates.items():
+            pair_votes = votes.get(self.icd11_codes[row]["code"])
+            if pair_votes:
+                score += feedback_index.adjustment(*pair_votes)
+            adjusted.append((row, score))
+        
+        adjusted.sort(key=lambda item: -item[1])
+        return [(row, min(max(score, 0.0), 1.0)) for row, score in adjusted[:top_k]]
+    
+    def _build_suggestions(self, similarities: List[Tuple[int, float]]) -> List[Dict]:
+        """
+        Build suggestion dictionaries from (index, score) pairs
+        
+        Args:
+            similarities: List of (ICD-11 row index, similarity score) tuples
+            
+        Returns:
+            List of ICD-11 suggestions with confidence scores
+        """
         suggestions = []
         for idx, score in similarities:
             icd_code = self.icd11_codes[idx]
@@ -131,11 +402,6 @@ class SimilarityMapper:
             
             suggestions.append(suggestion)
         
-        logger.info(
-            f"Mapped NAMASTE code '{namaste_code}' to {len(suggestions)} ICD-11 codes. "
-            f"Top match: {suggestions[0]['icd_code']} ({suggestions[0]['confidence']:.4f})"
-        )
-        
         return suggestions
     
     def is_loaded(self) -> bool:
@@ -0,0 +1,184 @@
+"""
+Precomputed NAMASTE to ICD-11 top-k mapping table
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import List, Optional, Tuple
+import numpy as np
+
+from app.config import settings
+from app.models.ann_index import embeddings_fingerprint
+from app.models.all_pairs import iter_top_k
+from app.utils.files import atomic_open
+from app.utils.logger import logger
+
+
+class MappingTable:
+    """
+    Top-k ICD-11 matches of every NAMASTE row, computed ahead of time
+    
+    The table is built with blocked matrix-matrix products of the two
+    embedding matrices (see all_pairs.iter_top_k), so memory stays within
+    a fixed budget regardless of corpus size. Results are
+    stored compactly: int32 ICD-11 row indices and float16 scores, each
+    [n_namaste, k], best match first. The float16 scores only rank the
+    stored candidates; the mapper recomputes exact similarities for the
+    ones it returns. Persisted tables are memory-mapped read-only like the
+    embedding matrices.
+    """
+    
+    FORMAT_VERSION = 1
+    
+    def __init__(self, top_k: int = 10, memory_mb: float = 256):
+        """
+        Initialize an empty table
+        
+        Args:
+            top_k: Matches stored per NAMASTE row
+            memory_mb: Working memory budget for building the table
+        """
+        self.top_k = top_k
+        self.memory_mb = memory_mb
+        self.indices = None     # [n_namaste, k] int32 ICD-11 rows
+        self.scores = None      # [n_namaste, k] float16 cosine similarities
+        self.fingerprint = None
+    
+    @staticmethod
+    def make_fingerprint(namaste_embeddings: np.ndarray, icd11_embeddings: np.ndarray) -> str:
+        """
+        Fingerprint of the embedding pair a table was built from
+        
+        Args:
+            namaste_embeddings: NAMASTE embedding matrix
+            icd11_embeddings: ICD-11 embedding matrix
+        
+        Returns:
+            Hex digest combining both matrix fingerprints
+        """
+        return hashlib.sha256(
+            f"{embeddings_fingerprint(namaste_embeddings)}|{embeddings_fingerprint(icd11_embeddings)}".encode("utf-8")
+        ).hexdigest()[:32]
+    
+    def build(self, namaste_embeddings: np.ndarray, icd11_embeddings: np.ndarray):
+        """
+        Compute the top-k ICD-11 rows for every NAMASTE row
+        
+        Args:
+            namaste_embeddings: NAMASTE embedding matrix (shape: [n, dim])
+            icd11_embeddings: ICD-11 embedding matrix (shape: [m, dim])
+        """
+        n_rows = namaste_embeddings.shape[0]
+        k = min(self.top_k, icd11_embeddings.shape[0])
+        self.indices = np.empty((n_rows, k), dtype=np.int32)
+        self.scores = np.empty((n_rows, k), dtype=np.float16)
+        
+        for start, indices, scores in iter_top_k(namaste_embeddings, icd11_embeddings, k, self.memory_mb):
+            end = start + indices.shape[0]
+            self.indices[start:end] = indices
+            self.scores[start:end] = scores
+        
+        self.fingerprint = self.make_fingerprint(namaste_embeddings, icd11_embeddings)
+        logger.info(f"Built NAMASTE to ICD-11 mapping table: {n_rows} rows x top {k}")
+    
+    def lookup(self, row: int, top_k: int) -> Optional[List[Tuple[int, float]]]:
+        """
+        Precomputed matches of one NAMASTE row
+        
+        Args:
+            row: NAMASTE row index
+            top_k: Number of matches
+        
+        Returns:
+            List of (ICD-11 row, similarity) tuples, best first, or None if
+            the table is not loaded or stores fewer than top_k matches
+        """
+        if self.indices is None or not 0 <= row < self.indices.shape[0] or top_k > self.indices.shape[1]:
+            return None
+        
+        indices = self.indices[row, :top_k]
+        scores = self.scores[row, :top_k].astype(np.float32)
+        return [(int(idx), float(score)) for idx, score in zip(indices, scores)]
+    
+    @property
+    def k(self) -> int:
+        """Matches stored per row"""
+        return 0 if self.indices is None else self.indices.shape[1]
+    
+    def save(self, directory: Path):
+        """Persist the table as .npy files"""
+        directory = Path(directory)
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            for name in ("indices", "scores"):
+                with atomic_open(directory / f"{name}.npy", 'wb') as f:
+                    np.save(f, getattr(self, name))
+            
+            # The metadata file is written last and commits the table
+            meta = {
+                "version": self.FORMAT_VERSION,
+                "top_k": self.top_k,
+                "fingerprint": self.fingerprint
+            }
+            with atomic_open(directory / "meta.json", 'w') as f:
+                json.dump(meta, f)
+            
+            logger.info(f"Saved mapping table to {directory}")
+        except Exception as e:
+            logger.error(f"Failed to save mapping table: {e}")
+    
+    def load(self, directory: Path, fingerprint: str) -> bool:
+        """Load a persisted table (memory-mapped) if still valid"""
+        directory = Path(directory)
+        meta_path = directory / "meta.json"
+        if not meta_path.exists():
+            return False
+        
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            
+            if meta.get("version") != self.FORMAT_VERSION \
+                    or meta.get("fingerprint") != fingerprint \
+                    or meta.get("top_k") != self.top_k:
+                logger.info(f"Mapping table at {directory} is stale, rebuilding")
+                return False
+            
+            mmap_mode = "r" if settings.embedding_mmap else None
+            self.indices = np.load(directory / "indices.npy", mmap_mode=mmap_mode)
+            self.scores = np.load(directory / "scores.npy", mmap_mode=mmap_mode)
+            self.fingerprint = fingerprint
+        except Exception as e:
+            logger.warning(f"Failed to load mapping table from {directory}: {e}")
+            return False
+        
+        logger.info(f"Loaded mapping table from {directory} ({self.indices.shape[0]} rows x top {self.k})")
+        return True
+
+
+def build_or_load_mapping_table(
+    namaste_embeddings: np.ndarray,
+    icd11_embeddings: np.ndarray,
+    rebuild: bool = False
+) -> MappingTable:
+    """
+    Load the persisted mapping table, building and saving it when stale
+    
+    Args:
+        namaste_embeddings: NAMASTE embedding matrix
+        icd11_embeddings: ICD-11 embedding matrix
+        rebuild: Rebuild even if a valid table exists
+    
+    Returns:
+        Built MappingTable
+    """
+    table = MappingTable(top_k=settings.mapping_table_top_k, memory_mb=settings.all_pairs_memory_mb)
+    directory = Path(settings.embedding_cache_dir) / "mapping_table"
+    fingerprint = MappingTable.make_fingerprint(namaste_embeddings, icd11_embeddings)
+    
+    if rebuild or not table.load(directory, fingerprint):
+        table.build(namaste_embeddings, icd11_embeddings)
+        table.save(directory)
+    
+    return table
@@ -0,0 +1,223 @@
+"""
+Vector scoring engine for cosine similarity search
+"""
+
+import threading
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+
+
+def l2_normalize(vectors: np.ndarray) -> np.ndarray:
+    """
+    L2-normalize vectors along the last axis
+    
+    Args:
+        vectors: Array of shape [dim] or [n, dim]
+    
+    Returns:
+        float32 array of unit vectors (zero vectors are left as zeros)
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def is_normalized(vectors: np.ndarray, tolerance: float = 1e-3) -> bool:
+    """
+    Check whether all rows are (approximately) unit length
+    
+    Args:
+        vectors: Array of shape [n, dim]
+        tolerance: Allowed deviation of each row norm from 1
+    
+    Returns:
+        True if every non-zero row is unit length
+    """
+    if vectors.shape[0] == 0:
+        return True
+    norms = np.linalg.norm(vectors, axis=1)
+    return bool(np.all((np.abs(norms - 1.0) <= tolerance) | (norms == 0)))
+
+
+def select_top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, best first
+    
+    Uses argpartition (O(n)) and only sorts the k selected entries.
+    
+    Args:
+        scores: 1-D score vector
+        k: Number of indices to return
+    
+    Returns:
+        int array of up to k indices sorted by descending score
+    """
+    n = scores.shape[0]
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    
+    if k < n:
+        candidates = np.argpartition(scores, n - k)[n - k:]
+    else:
+        candidates = np.arange(n)
+    
+    order = np.argsort(-scores[candidates], kind="stable")
+    return candidates[order]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], k: int = 60) -> List[Tuple[int, float]]:
+    """
+    Merge several rankings with reciprocal rank fusion (RRF)
+    
+    An item scores sum(1 / (k + rank)) over the rankings it appears in,
+    with ranks starting at 1. Only ranks are used, so rankings with
+    incomparable scores (e.g. BM25 and cosine similarity) fuse directly.
+    
+    Args:
+        rankings: Item lists, each best first
+        k: Damping constant; larger values flatten the rank contributions
+    
+    Returns:
+        List of (item, fused score) tuples, best first; ties keep the order
+        in which items were first seen
+    """
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            fused[item] = fused.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda entry: -entry[1])
+
+
+class VectorScorer:
+    """
+    Exact cosine similarity search over a fixed corpus
+    
+    Corpus embeddings are L2-normalized once at load time (already
+    normalized matrices, e.g. memory-mapped ones from the embedding store,
+    are used as-is without a copy). A query is then scored with a single
+    BLAS matrix-vector product into a preallocated buffer, and the top-k
+    rows are selected with argpartition instead of a full sort.
+    
+    Score buffers are per thread, so one scorer can serve concurrent
+    searches from the inference thread pool.
+    """
+    
+    def __init__(self):
+        """Initialize an empty scorer"""
+        self.embeddings = None
+        self._local = threading.local()
+    
+    def fit(self, embeddings: np.ndarray):
+        """
+        Load the corpus embeddings
+        
+        Args:
+            embeddings: Corpus embeddings (shape: [n, dim])
+        """
+        embeddings = np.asarray(embeddings)
+        if embeddings.dtype != np.float32 or not is_normalized(embeddings):
+            embeddings = l2_normalize(embeddings)
+        
+        self.embeddings = embeddings
+    
+    @property
+    def size(self) -> int:
+        """Number of corpus rows"""
+        return 0 if self.embeddings is None else self.embeddings.shape[0]
+    
+    def score(self, query_embedding: np.ndarray) -> np.ndarray:
+        """
+        Cosine similarity between one query and every corpus row
+        
+        Args:
+            query_embedding: Query vector (shape: [dim] or [1, dim])
+        
+        Returns:
+            Score vector (shape: [n]). This is the calling thread's buffer and
+            is overwritten by that thread's next call.
+        """
+        if self.embeddings is None:
+            raise ValueError("Corpus embeddings not loaded")
+        
+        query = l2_normalize(np.asarray(query_embedding).reshape(-1))
+        scores = self._score_buffer()
+        np.dot(self.embeddings, query, out=scores)
+        return scores
+    
+    def score_rows(self, query_embedding: np.ndarray, rows: Sequence[int]) -> np.ndarray:
+        """
+        Cosine similarity between one query and selected corpus rows
+        
+        Costs O(len(rows) * dim), so re-scoring a candidate set is much
+        cheaper than a full scan on large corpora.
+        
+        Args:
+            query_embedding: Query vector (shape: [dim] or [1, dim])
+            rows: Corpus row indices
+        
+        Returns:
+            Score vector (shape: [len(rows)]), in the order of rows
+        """
+        if self.embeddings is None:
+            raise ValueError("Corpus embeddings not loaded")
+        
+        query = l2_normalize(np.asarray(query_embedding).reshape(-1))
+        return self.embeddings[np.asarray(rows, dtype=np.int64)] @ query
+    
+    def _score_buffer(self) -> np.ndarray:
+        """Preallocated score vector for the calling thread"""
+        scores = getattr(self._local, "scores", None)
+        if scores is None or scores.shape[0] != self.size:
+            scores = np.empty(self.size, dtype=np.float32)
+            self._local.scores = scores
+        return scores
+    
+    def search(
+        self,
+        query_embedding: np.ndarray,
+        top_k: int
+    ) -> List[Tuple[int, float]]:
+        """
+        Find the top-k most similar corpus rows for one query
+        
+        Args:
+            query_embedding: Query vector
+            top_k: Number of results
+        
+        Returns:
+            List of (index, similarity_score) tuples, sorted by score
+        """
+        scores = self.score(query_embedding)
+        top_indices = select_top_k(scores, top_k)
+        return [(int(idx), float(scores[idx])) for idx in top_indices]
+    
+    def search_batch(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: int
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Find the top-k most similar corpus rows for several queries at once
+        
+        All queries are scored with a single matrix-matrix product.
+        
+        Args:
+            query_embeddings: Query matrix (shape: [n_queries, dim])
+            top_k: Number of results per query
+        
+        Returns:
+            One list of (index, similarity_score) tuples per query
+        """
+        if self.embeddings is None:
+            raise ValueError("Corpus embeddings not loaded")
+        
+        queries = l2_normalize(np.atleast_2d(query_embeddings))
+        scores = queries @ self.embeddings.T
+        
+        results = []
+        for row in scores:
+            top_indices = select_top_k(row, top_k)
+            results.append([(int(idx), float(row[idx])) for idx in top_indices])
+        return results
@@ -0,0 +1,148 @@
+"""
+BM25 relevance ranking for AYUSH code search
+"""
+
+from collections import Counter
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from scipy import sparse
+
+from app.services.normalizer import TextNormalizer
+
+
+class BM25Ranker:
+    """
+    Field-weighted BM25 (BM25F) over a precomputed term-document matrix
+    
+    Term frequencies from each field are length-normalized per field,
+    multiplied by the field boost and summed; the saturation and IDF factors
+    are then applied once at build time. Every query-independent part of the
+    score is therefore stored in one sparse [documents x terms] matrix, and
+    scoring a query is just summing the matrix columns of its terms.
+    """
+    
+    # Per-field boosts; a query term in the name counts most
+    FIELD_BOOSTS = {
+        'name': 3.0,
+        'name_english': 2.5,
+        'short_definition': 1.5,
+        'description': 1.0
+    }
+    
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        """
+        Initialize the ranker
+        
+        Args:
+            k1: Term frequency saturation
+            b: Strength of document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self.normalizer = TextNormalizer()
+        self.vocabulary: Dict[str, int] = {}
+        self.weights: Optional[sparse.csc_matrix] = None
+    
+    def tokenize(self, text: str) -> List[str]:
+        """
+        Split text into index terms
+        
+        Args:
+            text: Input text
+        
+        Returns:
+            Lowercased tokens (stopwords kept; IDF already discounts them)
+        """
+        return self.normalizer.tokenize(text, remove_stopwords=False)
+    
+    def build(self, codes: List[Dict]):
+        """
+        Build the BM25 weight matrix
+        
+        Args:
+            codes: AYUSH code dictionaries
+        """
+        n_docs = len(codes)
+        self.vocabulary = {}
+        rows, cols, values = [], [], []
+        
+        for field, boost in self.FIELD_BOOSTS.items():
+            field_rows, field_counts = [], []
+            lengths = np.zeros(n_docs, dtype=np.float32)
+            
+            for row, code in enumerate(codes):
+                tokens = self.tokenize(code.get(field) or '')
+                lengths[row] = len(tokens)
+                for term, count in Counter(tokens).items():
+                    field_rows.append(row)
+                    field_counts.append(count)
+                    cols.append(self.vocabulary.setdefault(term, len(self.vocabulary)))
+            
+            # Length-normalized, boosted term frequencies for this field
+            avg_length = lengths.mean() if lengths.any() else 1.0
+            norm = boost / (1 - self.b + self.b * lengths / avg_length)
+            rows.extend(field_rows)
+            values.append(np.asarray(field_counts, dtype=np.float32) * norm[field_rows])
+        
+        # Entries for the same (document, term) from different fields are summed
+        combined = sparse.coo_matrix(
+            (np.concatenate(values), (rows, cols)),
+            shape=(n_docs, len(self.vocabulary))
+        ).tocsc()
+        combined.sum_duplicates()
+        
+        # Document frequency and IDF per term
+        doc_freq = np.diff(combined.indptr).astype(np.float32)
+        idf = np.log1p((n_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+        
+        # Saturate term frequencies and fold in the IDF
+        term_of_entry = np.repeat(np.arange(combined.shape[1]), np.diff(combined.indptr))
+        tf = combined.data
+        combined.data = (idf[term_of_entry] * tf * (self.k1 + 1) / (tf + self.k1)).astype(np.float32)
+        
+        self.weights = combined
+    
+    def score(self, query: str, rows: Optional[Sequence[int]] = None) -> np.ndarray:
+        """
+        BM25 scores of documents for a query
+        
+        Args:
+            query: Query text
+            rows: Optional document rows to score (default: all)
+        
+        Returns:
+            Score per requested row (shape: [len(rows)] or [n_docs])
+        """
+        n_docs = self.weights.shape[0]
+        term_counts = Counter(
+            self.vocabulary[term] for term in self.tokenize(query) if term in self.vocabulary
+        )
+        
+        if not term_counts:
+            scores = np.zeros(n_docs, dtype=np.float32)
+        else:
+            columns = list(term_counts)
+            query_weights = np.asarray([term_counts[column] for column in columns], dtype=np.float32)
+            scores = self.weights[:, columns] @ query_weights
+        
+        if rows is None:
+            return scores
+        return scores[np.asarray(rows, dtype=np.int64)]
+    
+    def rank(self, query: str, rows: Sequence[int]) -> List[int]:
+        """
+        Order document rows by descending BM25 score
+        
+        Args:
+            query: Query text
+            rows: Document rows, e.g. the matches of a search
+        
+        Returns:
+            The same rows, best first; ties keep their original order
+        """
+        if len(rows) < 2 or self.weights is None:
+            return list(rows)
+        
+        scores = self.score(query, rows)
+        order = np.argsort(-scores, kind="stable")
+        return [rows[i] for i in order]
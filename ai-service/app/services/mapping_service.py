@@ -4,6 +4,7 @@ Core mapping service for NAMASTE to ICD-11 code mapping
 
 import json
 import time
+from itertools import islice
 from pathlib import Path
 from typing import List, Dict, Optional
 import numpy as np
@@ -11,8 +12,19 @@ import numpy as np
 from app.config import settings
 from app.utils.logger import logger
 from app.models.embedder import embedder
+from app.models.batcher import embedding_batcher
 from app.models.mapper import mapper
+from app.models.feedback_index import feedback_index
+from app.models.embedding_store import EmbeddingStore
+from app.models.mapping_table import build_or_load_mapping_table
+from app.models.scoring import VectorScorer, reciprocal_rank_fusion, select_top_k
 from app.services.preprocessing import preprocessor
+from app.services.bm25 import BM25Ranker
+from app.services.search_index import AyushSearchIndex, PrefixSuggester, build_code_index
+from app.models.ann_index import embeddings_fingerprint
+from app.utils.cache import result_cache, embedding_cache, create_redis_client, normalize_query
+from app.utils.executor import inference_executor
+from app.utils.feedback_store import feedback_store
 
 
 class MappingService:
@@ -24,8 +36,19 @@ class MappingService:
         """Initialize the mapping service"""
         self.icd11_codes = []
         self.namaste_codes = []
+        self.icd11_by_code = {}
+        self.namaste_by_code = {}
+        self.namaste_by_namc_id = {}
+        self.namaste_rows = {}
         self.icd11_embeddings = None
         self.namaste_embeddings = None
+        self.namaste_scorer = VectorScorer()
+        self.category_rows = {}
+        self.search_index = AyushSearchIndex()
+        self.ranker = BM25Ranker()
+        self.suggester = PrefixSuggester()
+        self.cache_version = ""
+        self.redis_client = None
         self.is_initialized = False
     
     async def initialize(self):
@@ -41,6 +64,7 @@ class MappingService:
             # Step 1: Load preprocessing model
             logger.info("Loading preprocessing model...")
             preprocessor.load_model()
+            preprocessor.load_synonyms()
             
             # Step 2: Load embedding model
             logger.info("Loading embedding model...")
@@ -49,16 +73,30 @@ class MappingService:
             # Step 3: Load datasets
             logger.info("Loading datasets...")
             self._load_datasets()
+            self._build_search_index()
             
-            # Step 4: Generate ICD-11 embeddings
-            logger.info("Generating ICD-11 embeddings...")
+            # Step 4: Load or generate ICD-11 embeddings
+            logger.info("Loading ICD-11 embeddings...")
             self._generate_icd11_embeddings()
 
             # Step 5: Generate NAMASTE embeddings
             self._generate_namaste_embeddings()
             
-            # Step 6: Load embeddings into mapper
+            # Step 6: Load embeddings (and the precomputed NAMASTE x ICD-11 table) into mapper
             mapper.load_icd11_embeddings(self.icd11_embeddings, self.icd11_codes)
+            if settings.mapping_table_enabled:
+                mapper.load_mapping_table(
+                    build_or_load_mapping_table(self.namaste_embeddings, self.icd11_embeddings)
+                )
+            
+            # Step 7: Start the inference pool, query batching and the feedback writer
+            inference_executor.start()
+            if settings.batching_enabled:
+                embedding_batcher.start()
+            feedback_store.start()
+            
+            # Step 8: Set up query caches, keyed by model, pipeline and data version
+            self._setup_caches()
             
             self.is_initialized = True
             elapsed = time.time() - start_time
@@ -73,6 +111,54 @@ class MappingService:
             logger.error(f"Failed to initialize Mapping Service: {e}")
             raise
     
+    async def shutdown(self):
+        """
+        Release background resources
+        
+        This should be called during application shutdown
+        """
+        await embedding_batcher.stop()
+        await feedback_store.stop()
+        inference_executor.shutdown()
+        if self.redis_client is not None:
+            await self.redis_client.close()
+    
+    def _setup_caches(self):
+        """Derive the cache version and connect the optional Redis tier"""
+        self.cache_version = "|".join([
+            embedder.model_name,
+            preprocessor.fingerprint(),
+            embeddings_fingerprint(self.icd11_embeddings),
+            embeddings_fingerprint(self.namaste_embeddings)
+        ])
+        
+        if settings.cache_enabled:
+            self.redis_client = create_redis_client()
+            result_cache.attach_redis(self.redis_client)
+            embedding_cache.attach_redis(self.redis_client)
+    
+    async def _embed_query(self, preprocessed_query: str) -> np.ndarray:
+        """
+        Encode a preprocessed query, reusing cached embeddings
+        
+        Args:
+            preprocessed_query: Output of the preprocessing pipeline
+            
+        Returns:
+            Query embedding vector
+        """
+        if not settings.cache_enabled:
+            return await embedding_batcher.encode(preprocessed_query)
+        
+        key = embedding_cache.make_key(self.cache_version, preprocessed_query)
+        query_embedding = await embedding_cache.get(key)
+        if query_embedding is None:
+            # Micro-batched with concurrent requests
+            query_embedding = await embedding_batcher.encode(preprocessed_query)
+            await embedding_cache.set(key, query_embedding)
+        
+        return query_embedding
+    
     def _load_datasets(self):
         """Load NAMASTE and ICD-11 datasets from JSON files"""
         # Load ICD-11 codes
@@ -94,80 +180,163 @@ class MappingService:
             self.namaste_codes = json.load(f)
         
         logger.info(f"Loaded {len(self.namaste_codes)} NAMASTE codes")
+        
+        # Identifier indexes for O(1) lookups
+        self.icd11_by_code = build_code_index(self.icd11_codes, 'code')
+        self.namaste_by_code = build_code_index(self.namaste_codes, 'code')
+        self.namaste_by_namc_id = build_code_index(self.namaste_codes, 'namc_id')
+        
+        # Dataset row of each NAMASTE code, for the precomputed mapping table
+        self.namaste_rows = {}
+        for row, code in enumerate(self.namaste_codes):
+            if code.get('code'):
+                self.namaste_rows.setdefault(code['code'], row)
+    
+    def _build_search_index(self):
+        """Build the inverted index, BM25 ranker and prefix suggester used by AYUSH code search"""
+        start_time = time.time()
+        self.search_index.build(self.namaste_codes)
+        self.ranker.build(self.namaste_codes)
+        feedback = self._load_feedback()
+        self.suggester.build(self.namaste_codes, popularity=self._feedback_counts(feedback))
+        stats = self.search_index.get_stats()
+        
+        logger.info(
+            f"Built AYUSH search index in {time.time() - start_time:.2f}s "
+            f"({stats['ngrams']} trigrams, {stats['tokens']} tokens, "
+            f"{len(self.ranker.vocabulary)} BM25 terms, "
+            f"{len(self.suggester)} suggestion terms)"
+        )
+    
+    def _load_feedback(self) -> List[Dict]:
+        """
+        Read the feedback log and build the re-ranking index from it
+        
+        Returns:
+            Stored feedback records
+        """
+        try:
+            records = list(feedback_store.iter_records())
+        except Exception as e:
+            logger.warning(f"Could not read feedback for suggestion and mapping ranking: {e}")
+            return []
+        
+        feedback_index.load(records)
+        # Feedback other workers append to the log is counted as it is read
+        feedback_store.subscribe(feedback_index.add)
+        stats = feedback_index.get_stats()
+        logger.info(f"Loaded {stats['records']} feedback records ({stats['pairs']} NAMASTE/ICD-11 pairs)")
+        return records
+    
+    def _feedback_counts(self, records: List[Dict]) -> Dict[str, int]:
+        """
+        Count recorded feedback per NAMASTE code, as a popularity signal
+        
+        Args:
+            records: Feedback records
+        
+        Returns:
+            Dictionary of code -> number of feedback records
+        """
+        counts = {}
+        for record in records:
+            code = record.get('namaste_code')
+            if code:
+                counts[code] = counts.get(code, 0) + 1
+        return counts
     
     def _generate_icd11_embeddings(self):
-        """Generate and cache embeddings for all ICD-11 codes"""
+        """Load cached ICD-11 embeddings, encoding only new or changed codes"""
         # Prepare text for embedding (combine name and description)
         icd11_texts = [
             f"{code['name']} {code.get('description', '')}"
             for code in self.icd11_codes
         ]
         
-        # Preprocess texts
-        preprocessed_texts = preprocessor.preprocess_batch(icd11_texts)
-        
-        # Generate embeddings
-        self.icd11_embeddings = embedder.encode_batch(preprocessed_texts)
+        store = self._embedding_store("icd11")
+        self.icd11_embeddings = store.load_or_encode(icd11_texts, self._encode_texts)
         
-        logger.info(f"Generated embeddings with shape: {self.icd11_embeddings.shape}")
+        logger.info(f"ICD-11 embeddings ready with shape: {self.icd11_embeddings.shape}")
     
     def _generate_namaste_embeddings(self):
-        """Generate and cache embeddings for all NAMASTE codes"""
-        # Try to load from cache first
-        try:
-            cache_path = Path(settings.namaste_data_path).parent / "namaste_embeddings.npy"
-            if cache_path.exists():
-                logger.info(f"Loading cached NAMASTE embeddings from {cache_path}...")
-                cached_embeddings = np.load(cache_path)
-                if cached_embeddings.shape[0] == len(self.namaste_codes):
-                    self.namaste_embeddings = cached_embeddings
-                    logger.info(f"Loaded cached embeddings with shape: {self.namaste_embeddings.shape}")
-                    return
-                else:
-                    logger.warning(f"Cached embeddings count ({cached_embeddings.shape[0]}) mismatch ({len(self.namaste_codes)}). Regenerating...")
-        except Exception as e:
-            logger.warning(f"Failed to load cached embeddings: {e}")
-
-        logger.info(f"Generating embeddings for {len(self.namaste_codes)} NAMASTE codes...")
-        
+        """Load cached NAMASTE embeddings, encoding only new or changed codes"""
         # Prepare text for embedding
         namaste_texts = [
             f"{code.get('name', '')} {code.get('name_english', '')} {code.get('description', '')}"
             for code in self.namaste_codes
         ]
         
-        # Process in batches to handle large dataset (7000+ codes)
+        store = self._embedding_store("namaste")
+        self.namaste_embeddings = store.load_or_encode(namaste_texts, self._encode_texts)
+        self.namaste_scorer.fit(self.namaste_embeddings)
+        self._build_category_rows()
+        
+        logger.info(f"NAMASTE embeddings ready with shape: {self.namaste_embeddings.shape}")
+    
+    def _build_category_rows(self):
+        """
+        Collect each category's NAMASTE row indices
+        
+        Category-filtered recommendations score only these rows of the
+        shared (memory-mapped) embedding matrix. The rows are gathered per
+        query rather than copied into per-category matrices, so workers
+        keep sharing one page-cached copy of the embeddings.
+        """
+        self.category_rows = {
+            category: np.asarray(rows, dtype=np.int64)
+            for category, rows in self.search_index.category_rows.items()
+        }
+    
+    def _embedding_store(self, name: str) -> EmbeddingStore:
+        """
+        Create the embedding store for a corpus
+        
+        Args:
+            name: Corpus name
+            
+        Returns:
+            EmbeddingStore bound to the current model and preprocessor
+        """
+        return EmbeddingStore(
+            name,
+            model_name=embedder.model_name,
+            preprocessor_fingerprint=preprocessor.fingerprint()
+        )
+    
+    def _encode_texts(self, texts: List[str]) -> np.ndarray:
+        """
+        Preprocess and encode raw texts in batches
+        
+        Preprocessing is streamed through nlp.pipe straight into the
+        embedder, so encoding starts as soon as the first batch is ready.
+        
+        Args:
+            texts: Raw texts
+            
+        Returns:
+            numpy array of embeddings
+        """
+        # Process in batches to handle large datasets (7000+ codes)
         batch_size = 64
         all_embeddings = []
-        total = len(namaste_texts)
+        total = len(texts)
+        start_time = time.time()
+        
+        preprocessed = preprocessor.preprocess_stream(
+            texts,
+            batch_size=settings.preprocess_batch_size,
+            n_process=settings.preprocess_n_process
+        )
         
-        if total == 0:
-            self.namaste_embeddings = np.array([])
-            return
-
         for i in range(0, total, batch_size):
-            batch = namaste_texts[i:i + batch_size]
-            # Preprocess
-            preprocessed_batch = preprocessor.preprocess_batch(batch)
-            # Encode
-            batch_embeddings = embedder.encode_batch(preprocessed_batch)
-            all_embeddings.append(batch_embeddings)
+            preprocessed_batch = list(islice(preprocessed, batch_size))
+            all_embeddings.append(embedder.encode(preprocessed_batch))
             
             if (i // batch_size) % 10 == 0:
-                logger.info(f"Processed {min(i + batch_size, total)}/{total} codes")
-        
-        if all_embeddings:
-            self.namaste_embeddings = np.vstack(all_embeddings)
-            logger.info(f"Generated NAMASTE embeddings with shape: {self.namaste_embeddings.shape}")
-            
-            # Save to cache
-            try:
-                np.save(cache_path, self.namaste_embeddings)
-                logger.info(f"Saved NAMASTE embeddings to {cache_path}")
-            except Exception as e:
-                logger.error(f"Failed to save embeddings cache: {e}")
-        else:
-            self.namaste_embeddings = np.array([])
+                logger.info(f"Encoded {min(i + batch_size, total)}/{total} texts")
+        
+        logger.info(f"Preprocessed and encoded {total} texts in {time.time() - start_time:.2f}s")
+        return np.vstack(all_embeddings)
     
     async def map_namaste_to_icd11(
         self,
@@ -200,19 +369,42 @@ class MappingService:
                 query_text = f"{disease_name} {symptoms}"
             
             logger.info(f"Mapping NAMASTE code: {namaste_code}, Query: {query_text}")
-            
-            # Step 2: Preprocess query
-            preprocessed_query = preprocessor.preprocess(query_text)
-            
-            # Step 3: Generate query embedding
-            query_embedding = embedder.encode(preprocessed_query)
-            
-            # Step 4: Find similar ICD-11 codes
-            suggestions = mapper.map_to_icd11(
-                query_embedding,
-                namaste_code=namaste_code,
-                top_k=top_k
+            if settings.feedback_rerank_enabled:
+                feedback_store.refresh()
+            
+            # Known codes without extra symptoms skip the model (still off the
+            # event loop: without a table this scans the ICD-11 index)
+            suggestions = None
+            row = self.namaste_rows.get(namaste_code)
+            if not symptoms and row is not None:
+                suggestions = await inference_executor.run(self._map_known_code, row, namaste_code, top_k)
+            
+            # Results for a code with feedback depend on its votes
+            feedback_version = feedback_index.code_version(namaste_code) if settings.feedback_rerank_enabled else ""
+            cache_key = result_cache.make_key(
+                "map", self.cache_version, normalize_query(query_text), top_k,
+                f"{namaste_code}@{feedback_version}" if feedback_version else ""
             )
+            if suggestions is None and settings.cache_enabled:
+                suggestions = await result_cache.get(cache_key)
+            
+            if suggestions is None:
+                # Step 2: Preprocess query
+                preprocessed_query = await inference_executor.run(preprocessor.preprocess, query_text)
+                
+                # Step 3: Generate query embedding
+                query_embedding = await self._embed_query(preprocessed_query)
+                
+                # Step 4: Find similar ICD-11 codes
+                suggestions = await inference_executor.run_admitted(
+                    mapper.map_to_icd11,
+                    query_embedding,
+                    namaste_code=namaste_code,
+                    top_k=top_k
+                )
+                
+                if settings.cache_enabled:
+                    await result_cache.set(cache_key, suggestions)
             
             # Calculate processing time
             processing_time = (time.time() - start_time) * 1000  # Convert to ms
@@ -231,6 +423,92 @@ class MappingService:
             logger.error(f"Mapping failed: {e}")
             raise
     
+    def _map_known_code(self, row: int, namaste_code: str, top_k: int) -> Optional[List[Dict]]:
+        """
+        Map a known NAMASTE code from its stored embedding, without the model
+        
+        Established feedback mappings are used first, otherwise the
+        precomputed table.
+        
+        Args:
+            row: Row of the code in the NAMASTE dataset
+            namaste_code: NAMASTE code
+            top_k: Number of suggestions to return
+            
+        Returns:
+            List of ICD-11 suggestions, or None if neither source applies
+        """
+        namaste_embedding = self.namaste_embeddings[row]
+        suggestions = mapper.map_from_feedback(row, namaste_embedding, namaste_code, top_k)
+        if suggestions is None:
+            suggestions = mapper.map_from_table(row, namaste_embedding, namaste_code, top_k)
+        return suggestions
+    
+    async def map_batch(self, items: List[Dict]) -> Dict:
+        """
+        Map many NAMASTE diseases to ICD-11 codes in one pass
+        
+        Queries are preprocessed with a single nlp.pipe run, encoded with a
+        single embedder call and scored with a single matrix-matrix product.
+        
+        Args:
+            items: List of dicts with namaste_code, disease_name,
+                   optional symptoms and top_k
+            
+        Returns:
+            Dictionary with per-item suggestions and metadata
+        """
+        if not self.is_initialized:
+            raise RuntimeError("Mapping Service not initialized. Call initialize() first.")
+        
+        start_time = time.time()
+        
+        try:
+            # Step 1: Prepare query texts
+            query_texts = [
+                f"{item['disease_name']} {item['symptoms']}" if item.get("symptoms") else item["disease_name"]
+                for item in items
+            ]
+            
+            logger.info(f"Mapping batch of {len(items)} NAMASTE codes")
+            if settings.feedback_rerank_enabled:
+                feedback_store.refresh()
+            
+            # Step 2: Preprocess all queries together
+            preprocessed_queries = await inference_executor.run(preprocessor.preprocess_batch, query_texts)
+            
+            # Step 3: Generate all query embeddings in one call
+            query_embeddings = await inference_executor.run_admitted(embedder.encode, preprocessed_queries)
+            
+            # Step 4: Score all queries against ICD-11 codes
+            top_ks = [item.get("top_k") or settings.top_k_results for item in items]
+            batch_suggestions = await inference_executor.run_admitted(
+                mapper.map_batch_to_icd11, query_embeddings, top_ks,
+                [item["namaste_code"] for item in items]
+            )
+            
+            processing_time = (time.time() - start_time) * 1000
+            
+            results = [
+                {
+                    "namaste_code": item["namaste_code"],
+                    "disease_name": item["disease_name"],
+                    "suggestions": suggestions
+                }
+                for item, suggestions in zip(items, batch_suggestions)
+            ]
+            
+            logger.info(f"Batch mapping of {len(items)} codes completed in {processing_time:.2f}ms")
+            return {
+                "results": results,
+                "count": len(results),
+                "processing_time_ms": round(processing_time, 2)
+            }
+            
+        except Exception as e:
+            logger.error(f"Batch mapping failed: {e}")
+            raise
+    
     async def save_feedback(
         self,
         namaste_code: str,
@@ -255,32 +533,18 @@ class MappingService:
             Feedback record with ID
         """
         try:
-            feedback_path = Path(settings.feedback_data_path)
-            
-            # Load existing feedback
-            if feedback_path.exists():
-                with open(feedback_path, 'r') as f:
-                    feedback_data = json.load(f)
-            else:
-                feedback_data = []
-            
-            # Create new feedback record
-            feedback_record = {
-                "id": f"FB-{len(feedback_data) + 1:04d}",
-                "timestamp": time.time(),
+            # Appended to the feedback log; the ID is assigned by the store
+            feedback_record = await feedback_store.append({
                 "namaste_code": namaste_code,
                 "suggested_icd_code": suggested_icd_code,
                 "accepted": accepted,
                 "correct_icd_code": correct_icd_code,
                 "notes": notes,
                 "doctor_id": doctor_id
-            }
+            })
             
-            # Append and save
-            feedback_data.append(feedback_record)
-            
-            with open(feedback_path, 'w') as f:
-                json.dump(feedback_data, f, indent=2)
+            # Takes effect on the next /map for this code
+            feedback_index.add(feedback_record)
             
             logger.info(f"Feedback saved: {feedback_record['id']}")
             return feedback_record
@@ -315,6 +579,8 @@ class MappingService:
         """
         Search AYUSH codes by text query
         
+        Matches are ranked by BM25 relevance, best first.
+        
         Args:
             query: Search query text
             category: Optional category filter
@@ -327,29 +593,15 @@ class MappingService:
         if not self.is_initialized:
             raise RuntimeError("Mapping Service not initialized")
         
-        query_lower = query.lower()
-        results = []
+        # Substring match over name, English/diacritical names, description and code
+        rows = self.search_index.search(query, category)
         
-        for code in self.namaste_codes:
-            # Skip if category filter doesn't match
-            if category and code.get('category') != category:
-                continue
-            
-            # Search in multiple fields
-            searchable_text = " ".join([
-                code.get('name', ''),
-                code.get('name_english', ''),
-                code.get('name_diacritical', ''),
-                code.get('description', ''),
-                code.get('code', '')
-            ]).lower()
-            
-            if query_lower in searchable_text:
-                results.append(code)
+        # Most relevant first (BM25 over name, English name, short definition and description)
+        rows = self.ranker.rank(query, rows)
         
         # Pagination
-        total = len(results)
-        paginated_results = results[offset:offset + limit]
+        total = len(rows)
+        paginated_results = [self.namaste_codes[row] for row in rows[offset:offset + limit]]
         
         return {
             "results": paginated_results,
@@ -359,12 +611,44 @@ class MappingService:
             "has_more": offset + limit < total
         }
     
+    async def suggest_ayush_codes(self, prefix: str, limit: int = 10) -> Dict:
+        """
+        Autocomplete AYUSH codes by name or code prefix
+        
+        Args:
+            prefix: Text typed so far
+            limit: Maximum suggestions to return
+            
+        Returns:
+            Dictionary with ranked suggestions
+        """
+        if not self.is_initialized:
+            raise RuntimeError("Mapping Service not initialized")
+        
+        suggestions = []
+        for row, term, field, weight in self.suggester.suggest(prefix, limit):
+            code = self.namaste_codes[row]
+            suggestions.append({
+                "code": code.get('code'),
+                "text": term,
+                "matched_field": field,
+                "name": code.get('name'),
+                "name_english": code.get('name_english', ''),
+                "category": code.get('category', ''),
+                "score": round(weight, 4)
+            })
+        
+        return {
+            "prefix": prefix,
+            "suggestions": suggestions
+        }
+    
     async def get_ayush_code(self, code: str) -> Optional[Dict]:
         """
         Get specific AYUSH code by code ID
         
         Args:
-            code: AYUSH code identifier
+            code: AYUSH code identifier (or NAMC ID)
             
         Returns:
             Code details or None if not found
@@ -372,11 +656,54 @@ class MappingService:
         if not self.is_initialized:
             raise RuntimeError("Mapping Service not initialized")
         
-        for ayush_code in self.namaste_codes:
-            if ayush_code.get('code') == code:
-                return ayush_code
+        return self._find_ayush_code(code)
+    
+    async def lookup_ayush_codes(self, codes: List[str]) -> Dict:
+        """
+        Resolve several AYUSH codes in one call
+        
+        Args:
+            codes: AYUSH code identifiers (or NAMC IDs)
+            
+        Returns:
+            Dictionary with found codes (request order, duplicates removed)
+            and the identifiers that were not found
+        """
+        if not self.is_initialized:
+            raise RuntimeError("Mapping Service not initialized")
+        
+        results = []
+        not_found = []
+        for code in dict.fromkeys(codes):
+            ayush_code = self._find_ayush_code(code)
+            if ayush_code is None:
+                not_found.append(code)
+            else:
+                results.append(ayush_code)
+        
+        return {
+            "results": results,
+            "not_found": not_found
+        }
+    
+    def _find_ayush_code(self, code: str) -> Optional[Dict]:
+        """Look up an AYUSH code by code, falling back to NAMC ID"""
+        ayush_code = self.namaste_by_code.get(code)
+        if ayush_code is None:
+            ayush_code = self.namaste_by_namc_id.get(code)
+        return ayush_code
+    
+    def get_icd11_code(self, code: str) -> Optional[Dict]:
+        """
+        Get an ICD-11 code by its code
         
-        return None
+        Args:
+            code: ICD-11 code (e.g. 'DA63')
+            
+        Returns:
+            Code details or None if not found
+        """
+        return self.icd11_by_code.get(code)
     
     def get_categories(self) -> List[str]:
         """
@@ -388,19 +715,33 @@ class MappingService:
         if not self.is_initialized:
             raise RuntimeError("Mapping Service not initialized")
         
-        categories = set()
-        for code in self.namaste_codes:
-            category = code.get('category')
-            if category:
-                categories.add(category)
+        return list(self.search_index.category_counts())
+    
+    def get_category_facets(self) -> Dict:
+        """
+        Get categories with the number of codes in each
+        
+        Returns:
+            Dictionary with per-category counts and the total number of codes
+        """
+        if not self.is_initialized:
+            raise RuntimeError("Mapping Service not initialized")
         
-        return sorted(list(categories))
+        return {
+            "categories": [
+                {"name": category, "count": count}
+                for category, count in self.search_index.category_counts().items()
+            ],
+            "total_codes": len(self.namaste_codes)
+        }
     
     async def get_recommendations(
         self,
         symptoms: str,
         patient_history: Optional[str] = None,
-        top_k: int = 5
+        top_k: int = 5,
+        category: Optional[str] = None,
+        retrieval_mode: Optional[str] = None
     ) -> Dict:
         """
         Get AI-powered AYUSH code recommendations based on symptoms
@@ -409,6 +750,8 @@ class MappingService:
             symptoms: Patient symptoms description
             patient_history: Optional patient history
             top_k: Number of recommendations to return
+            category: Optional category to recommend from
+            retrieval_mode: 'dense', 'sparse' or 'hybrid' (default: settings.retrieval_mode)
             
         Returns:
             Dictionary with AYUSH code recommendations
@@ -426,49 +769,16 @@ class MappingService:
             
             logger.info(f"Getting recommendations for: {query_text[:100]}...")
             
-            # Preprocess query
-            preprocessed_query = preprocessor.preprocess(query_text)
-            
-            # Generate query embedding
-            query_embedding = embedder.encode(preprocessed_query)
-            
-            # Use cached embeddings
-            if self.namaste_embeddings is None:
-                logger.warning("NAMASTE embeddings not found, regenerating (this should be cached)...")
-                self._generate_namaste_embeddings()
-            
-            ayush_embeddings = self.namaste_embeddings
-            
-            # Calculate similarities
-            from sklearn.metrics.pairwise import cosine_similarity
-            similarities = cosine_similarity(query_embedding, ayush_embeddings)[0]
-            
-            # Get top-k indices
-            top_indices = np.argsort(similarities)[-top_k:][::-1]
+            mode = (retrieval_mode or settings.retrieval_mode).lower()
+            cache_key = result_cache.make_key(
+                "recommend", self.cache_version, normalize_query(query_text), top_k, category or "", mode
+            )
+            recommendations = await result_cache.get(cache_key) if settings.cache_enabled else None
             
-            # Build recommendations
-            recommendations = []
-            for idx in top_indices:
-                code = self.namaste_codes[idx]
-                confidence = float(similarities[idx])
-                
-                # Determine confidence level
-                if confidence >= 0.7:
-                    confidence_level = "high"
-                elif confidence >= 0.5:
-                    confidence_level = "medium"
-                else:
-                    confidence_level = "low"
-                
-                recommendations.append({
-                    "code": code.get('code'),
-                    "name": code.get('name'),
-                    "name_english": code.get('name_english'),
-                    "description": code.get('description'),
-                    "category": code.get('category'),
-                    "confidence": round(confidence, 3),
-                    "confidence_level": confidence_level
-                })
+            if recommendations is None:
+                recommendations = await self._recommend(query_text, top_k, category, mode)
+                if settings.cache_enabled:
+                    await result_cache.set(cache_key, recommendations)
             
             processing_time = (time.time() - start_time) * 1000
             
@@ -484,7 +794,162 @@ class MappingService:
         except Exception as e:
             logger.error(f"Recommendation failed: {e}")
             raise
-
+    
+    async def _recommend(
+        self,
+        query_text: str,
+        top_k: int,
+        category: Optional[str] = None,
+        mode: str = "dense"
+    ) -> List[Dict]:
+        """
+        Rank AYUSH codes for a query
+        
+        Args:
+            query_text: Symptoms (and history) text
+            top_k: Number of recommendations to return
+            category: Optional category to restrict scoring to
+            mode: Retrieval mode, see _retrieve
+            
+        Returns:
+            List of recommendation dictionaries
+        """
+        # Preprocess query
+        preprocessed_query = await inference_executor.run(preprocessor.preprocess, query_text)
+        
+        # Generate query embedding
+        query_embedding = await self._embed_query(preprocessed_query)
+        
+        # Use cached embeddings
+        if self.namaste_embeddings is None:
+            logger.warning("NAMASTE embeddings not found, regenerating (this should be cached)...")
+            self._generate_namaste_embeddings()
+        
+        # BM25 matches the raw words plus their synonyms; the embedding covers meaning
+        lexical_query = preprocessor.expand_ayush_terms(query_text)
+        top_matches = await inference_executor.run_admitted(
+            self._retrieve, lexical_query, query_embedding, top_k, category, mode
+        )
+        
+        # Build recommendations
+        recommendations = []
+        for idx, confidence in top_matches:
+            code = self.namaste_codes[idx]
+            
+            # Determine confidence level
+            if confidence >= 0.7:
+                confidence_level = "high"
+            elif confidence >= 0.5:
+                confidence_level = "medium"
+            else:
+                confidence_level = "low"
+            
+            recommendations.append({
+                "code": code.get('code'),
+                "name": code.get('name'),
+                "name_english": code.get('name_english'),
+                "description": code.get('description'),
+                "category": code.get('category'),
+                "confidence": round(confidence, 3),
+                "confidence_level": confidence_level
+            })
+        
+        return recommendations
+    
+    def _retrieve(
+        self,
+        lexical_query: str,
+        query_embedding: np.ndarray,
+        top_k: int,
+        category: Optional[str] = None,
+        mode: str = "dense"
+    ) -> List[tuple]:
+        """
+        Find the NAMASTE codes best matching a query
+        
+        Modes:
+        - dense: cosine similarity against every row (see _search_namaste)
+        - sparse: BM25 over the lexical query
+        - hybrid: the top BM25 rows are re-scored by cosine similarity and
+          the two rankings are merged with reciprocal rank fusion, so only
+          a few hundred rows are scored densely. When BM25 finds fewer than
+          hybrid_min_candidates rows (e.g. no query word is indexed), the
+          dense ranking comes from a full scan instead.
+        
+        Args:
+            lexical_query: Query text for BM25
+            query_embedding: Query vector
+            top_k: Number of results
+            category: Optional category; only its rows are considered
+            mode: 'dense', 'sparse' or 'hybrid'
+            
+        Returns:
+            List of (row index, similarity_score) tuples in ranked order. The
+            score is the cosine similarity in every mode, so confidence levels
+            keep their meaning.
+        """
+        if mode == "dense":
+            return self._search_namaste(query_embedding, top_k, category)
+        if mode not in ("sparse", "hybrid"):
+            raise ValueError(f"Unknown retrieval mode: {mode}")
+        
+        rows = None
+        if category:
+            if category not in self.category_rows:
+                return []
+            rows = self.category_rows[category]
+        
+        # Sparse stage: BM25 candidates (rows with at least one query term)
+        bm25_scores = self.ranker.score(lexical_query, rows)
+        top = select_top_k(bm25_scores, settings.hybrid_candidates)
+        top = top[bm25_scores[top] > 0]
+        sparse_ranking = top if rows is None else rows[top]
+        
+        if mode == "sparse":
+            ranking = sparse_ranking[:top_k]
+        else:
+            if len(sparse_ranking) >= settings.hybrid_min_candidates:
+                # Dense stage on the candidates only
+                similarities = self.namaste_scorer.score_rows(query_embedding, sparse_ranking)
+                dense_ranking = sparse_ranking[np.argsort(-similarities, kind="stable")]
+            else:
+                dense_ranking = [
+                    row for row, _ in self._search_namaste(query_embedding, settings.hybrid_candidates, category)
+                ]
+            
+            fused = reciprocal_rank_fusion([dense_ranking, sparse_ranking], settings.rrf_k)
+            ranking = [row for row, _ in fused[:top_k]]
+        
+        ranking = np.asarray(ranking, dtype=np.int64)
+        similarities = self.namaste_scorer.score_rows(query_embedding, ranking)
+        return [(int(row), float(score)) for row, score in zip(ranking, similarities)]
+    
+    def _search_namaste(
+        self,
+        query_embedding: np.ndarray,
+        top_k: int,
+        category: Optional[str] = None
+    ) -> List[tuple]:
+        """
+        Find the NAMASTE codes most similar to a query embedding
+        
+        Args:
+            query_embedding: Query vector
+            top_k: Number of results
+            category: Optional category; only its rows are scored
+            
+        Returns:
+            List of (row index, similarity_score) tuples, sorted by score
+        """
+        if not category:
+            return self.namaste_scorer.search(query_embedding, top_k)
+        
+        if category not in self.category_rows:
+            return []
+        
+        rows = self.category_rows[category]
+        scores = self.namaste_scorer.score_rows(query_embedding, rows)
+        return [(int(rows[idx]), float(scores[idx])) for idx in select_top_k(scores, top_k)]
 
 
 # Global service instance
@@ -0,0 +1,126 @@
+"""
+Fast text normalization: character filtering, tokenization and stopword removal
+
+Pure Python with no service dependencies, so it can be shared by the
+lightweight service as well.
+"""
+
+import re
+import string
+from typing import Iterable, List
+
+
+def _build_ascii_table() -> dict:
+    """
+    Translation table for ASCII characters after lowercasing
+    
+    Keeps a-z, 0-9, whitespace and hyphens; every other ASCII character
+    becomes a space.
+    """
+    keep = set(string.ascii_lowercase + string.digits + "-")
+    return {
+        code: " "
+        for code in range(128)
+        if chr(code) not in keep and not chr(code).isspace()
+    }
+
+
+# Applied with str.translate, which is a single C-level pass over the text
+_ASCII_TABLE = _build_ascii_table()
+
+# Non-ASCII characters other than whitespace (only needed for non-ASCII text)
+_NON_ASCII_PATTERN = re.compile(r"[^\x00-\x7f\s]")
+
+
+class TextNormalizer:
+    """
+    Lowercases, filters and tokenizes text in as few passes as possible
+    
+    Output is identical to the regex-based cleaning it replaces: lowercase,
+    every character except a-z, 0-9, whitespace and '-' replaced with a
+    space, whitespace collapsed to single spaces.
+    """
+    
+    def __init__(self, stopwords: Iterable[str] = ()):
+        """
+        Initialize the normalizer
+        
+        Args:
+            stopwords: Words dropped by tokenize(), normalize() and
+                       remove_stopwords() (case-insensitive)
+        """
+        self.stopwords = frozenset(word.lower() for word in stopwords)
+    
+    @staticmethod
+    def _filter(text: str) -> str:
+        """Lowercase and replace unwanted characters with spaces"""
+        text = text.lower()
+        if not text.isascii():
+            text = _NON_ASCII_PATTERN.sub(" ", text)
+        return text.translate(_ASCII_TABLE)
+    
+    def clean(self, text: str) -> str:
+        """
+        Clean text without removing stopwords
+        
+        Args:
+            text: Input text
+        
+        Returns:
+            Cleaned text
+        """
+        if not text:
+            return ""
+        return " ".join(self._filter(text).split())
+    
+    def tokenize(self, text: str, remove_stopwords: bool = True) -> List[str]:
+        """
+        Clean, split and filter text in one sweep
+        
+        Args:
+            text: Input text
+            remove_stopwords: Whether to drop stopwords
+        
+        Returns:
+            List of tokens
+        """
+        if not text:
+            return []
+        
+        tokens = self._filter(text).split()
+        if remove_stopwords and self.stopwords:
+            stopwords = self.stopwords
+            tokens = [token for token in tokens if token not in stopwords]
+        return tokens
+    
+    def normalize(self, text: str) -> str:
+        """
+        Clean text and remove stopwords in one sweep
+        
+        Args:
+            text: Input text
+        
+        Returns:
+            Normalized text
+        """
+        return " ".join(self.tokenize(text))
+    
+    def remove_stopwords(self, text: str) -> str:
+        """
+        Remove stopwords from already tokenized, space-separated text
+        
+        Args:
+            text: Input text
+        
+        Returns:
+            Text without stopwords, words joined by single spaces
+        """
+        words = text.split()
+        if not self.stopwords:
+            return " ".join(words)
+        
+        stopwords = self.stopwords
+        if text.lower() == text:
+            # Already lowercase (the common case after clean()): no per-word lower()
+            return " ".join([word for word in words if word not in stopwords])
+        return " ".join([word for word in words if word.lower() not in stopwords])
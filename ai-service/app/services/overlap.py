@@ -0,0 +1,119 @@
+"""
+Word-overlap scoring for the lightweight service's /recommend
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from scipy import sparse
+
+
+class WordOverlapScorer:
+    """
+    Query/code word overlap over a precomputed binary term-document matrix
+    
+    A code's score is the fraction of distinct query words that also occur
+    in its text (whitespace tokens of the lowercased name, English name,
+    description and definitions). Each code's word set is stored once as a
+    row of a sparse [codes x words] 0/1 matrix, so scoring a query is one
+    sparse matrix-vector product with the query's word indicator vector.
+    """
+    
+    FIELDS = ('name', 'name_english', 'description', 'short_definition', 'long_definition')
+    
+    def __init__(self, codes: Optional[List[Dict]] = None):
+        """
+        Initialize the scorer
+        
+        Args:
+            codes: Optional AYUSH code dictionaries to build from
+        """
+        self.vocabulary: Dict[str, int] = {}
+        self.matrix: Optional[sparse.csr_matrix] = None
+        if codes is not None:
+            self.build(codes)
+    
+    @classmethod
+    def searchable_text(cls, code: Dict) -> str:
+        """Lowercased text that query words are matched against"""
+        return " ".join(code.get(field) or '' for field in cls.FIELDS).lower()
+    
+    def build(self, codes: List[Dict]):
+        """
+        Build the term-document matrix
+        
+        Args:
+            codes: AYUSH code dictionaries
+        """
+        self.vocabulary = {}
+        indptr, indices = [0], []
+        
+        for code in codes:
+            words = set(self.searchable_text(code).split())
+            indices.extend(self.vocabulary.setdefault(word, len(self.vocabulary)) for word in words)
+            indptr.append(len(indices))
+        
+        self.matrix = sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.float32), indices, indptr),
+            shape=(len(codes), len(self.vocabulary))
+        )
+    
+    def score(self, query: str, rows: Optional[Sequence[int]] = None) -> np.ndarray:
+        """
+        Overlap scores of codes for a query
+        
+        Args:
+            query: Query text
+            rows: Optional code rows to score (default: all)
+        
+        Returns:
+            Fraction of distinct query words found, per requested row
+            (shape: [len(rows)] or [n_codes])
+        """
+        query_words = set(query.lower().split())
+        n_docs = self.matrix.shape[0] if rows is None else len(rows)
+        term_ids = [self.vocabulary[word] for word in query_words if word in self.vocabulary]
+        if not term_ids:
+            return np.zeros(n_docs)
+        
+        query_vector = np.zeros(self.matrix.shape[1], dtype=np.float32)
+        query_vector[term_ids] = 1.0
+        
+        matrix = self.matrix if rows is None else self.matrix[np.asarray(rows, dtype=np.int64)]
+        matches = matrix @ query_vector
+        # Divide in float64 so e.g. 7/10 still clears a 0.7 threshold
+        return matches.astype(np.float64) / len(query_words)
+    
+    def top_k(self, query: str, k: int, rows: Optional[Sequence[int]] = None) -> List[Tuple[int, float]]:
+        """
+        Codes with the highest overlap
+        
+        Args:
+            query: Query text
+            k: Number of results
+            rows: Optional code rows to restrict to (default: all)
+        
+        Returns:
+            List of (row, score) tuples with score > 0, best first; equal
+            scores keep row order
+        """
+        scores = self.score(query, rows)
+        matched = np.flatnonzero(scores > 0)
+        k = min(k, len(matched))
+        if k <= 0:
+            return []
+        
+        if k < len(matched):
+            # Keep everything tied with the k-th score so ties resolve by row
+            kth = -np.partition(-scores[matched], k - 1)[k - 1]
+            matched = matched[scores[matched] >= kth]
+        
+        # Score descending, then row ascending
+        order = np.lexsort((matched, -scores[matched]))
+        selected = matched[order[:k]]
+        
+        ids = selected if rows is None else np.asarray(rows, dtype=np.int64)[selected]
+        return [(int(row), float(scores[idx])) for row, idx in zip(ids, selected)]
+    
+    def __len__(self) -> int:
+        """Number of indexed codes"""
+        return 0 if self.matrix is None else self.matrix.shape[0]
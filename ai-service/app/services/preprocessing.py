@@ -2,9 +2,15 @@
 Medical text preprocessing for NLP pipeline
 """
 
+import hashlib
+import json
 import re
 import spacy
-from typing import List, Dict
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Pattern
+from app.config import settings
+from app.services.normalizer import TextNormalizer
+from app.utils.cache import LRUCache
 from app.utils.logger import logger
 
 
@@ -13,13 +19,17 @@ class MedicalPreprocessor:
     Preprocesses medical text for embedding generation
     """
     
+    # Bump whenever the pipeline output changes, so cached embeddings are rebuilt
+    PIPELINE_VERSION = "2"
+    
     # Medical stopwords (common words with little semantic value)
     MEDICAL_STOPWORDS = {
         'patient', 'disease', 'condition', 'syndrome', 'disorder',
         'symptoms', 'signs', 'diagnosis', 'treatment', 'therapy'
     }
     
-    # AYUSH to Allopathy synonym mapping
+    # Built-in AYUSH to Allopathy synonym mapping, used when no synonym file
+    # is found (see settings.synonyms_data_path)
     AYUSH_SYNONYMS = {
         'amlapitta': ['acid reflux', 'heartburn', 'gerd', 'gastritis'],
         'jwara': ['fever', 'pyrexia'],
@@ -34,9 +44,27 @@ class MedicalPreprocessor:
         'kapha': ['phlegm', 'mucus', 'congestion']
     }
     
-    def __init__(self):
-        """Initialize preprocessor with spaCy model"""
+    # spaCy components not needed for lemmas and stop flags (lemmatizer
+    # only depends on tok2vec, tagger and attribute_ruler)
+    DISABLED_COMPONENTS = ["parser", "ner"]
+    
+    def __init__(self, cache_size: Optional[int] = None):
+        """
+        Initialize preprocessor with spaCy model
+        
+        Args:
+            cache_size: Entries in the preprocess() memo cache
+                        (default: from settings, 0 disables memoization)
+        """
         self.nlp = None
+        self.normalizer = TextNormalizer(self.MEDICAL_STOPWORDS)
+        if cache_size is None:
+            cache_size = settings.preprocess_cache_size
+        self.cache = LRUCache(max_entries=cache_size) if cache_size > 0 else None
+        
+        self.synonyms: Dict[str, List[str]] = {}
+        self._synonym_pattern: Optional[Pattern] = None
+        self.set_synonyms(self.AYUSH_SYNONYMS)
         
     def load_model(self):
         """
@@ -46,15 +74,62 @@ class MedicalPreprocessor:
         """
         try:
             logger.info("Loading spaCy model...")
-            self.nlp = spacy.load("en_core_web_sm")
-            logger.info("spaCy model loaded successfully")
+            self.nlp = spacy.load("en_core_web_sm", disable=self.DISABLED_COMPONENTS)
+            logger.info(f"spaCy model loaded successfully (pipes: {', '.join(self.nlp.pipe_names)})")
         except OSError:
             logger.warning("spaCy model not found. Downloading...")
             import subprocess
             subprocess.run(["python", "-m", "spacy", "download", "en_core_web_sm"])
-            self.nlp = spacy.load("en_core_web_sm")
+            self.nlp = spacy.load("en_core_web_sm", disable=self.DISABLED_COMPONENTS)
             logger.info("spaCy model downloaded and loaded")
     
+    def load_synonyms(self, path: Optional[str] = None):
+        """
+        Load the AYUSH synonym table from a JSON file
+        
+        The file maps each AYUSH term to a list of allopathic synonyms.
+        Falls back to the built-in table if the file does not exist.
+        
+        Args:
+            path: Synonym file (default: settings.synonyms_data_path)
+        """
+        path = Path(path or settings.synonyms_data_path)
+        if not path.exists():
+            logger.warning(f"Synonym file not found: {path}. Using built-in synonym table.")
+            self.set_synonyms(self.AYUSH_SYNONYMS)
+            return
+        
+        with open(path, 'r', encoding='utf-8') as f:
+            synonyms = json.load(f)
+        
+        if not isinstance(synonyms, dict):
+            raise ValueError(f"Synonym file {path} must contain a JSON object of term -> synonyms")
+        
+        self.set_synonyms(synonyms)
+        logger.info(f"Loaded {len(self.synonyms)} AYUSH synonym terms from {path}")
+    
+    def set_synonyms(self, synonyms: Dict[str, List[str]]):
+        """
+        Replace the synonym table and compile its matcher
+        
+        Terms are normalized with clean_text(), so they match cleaned input.
+        
+        Args:
+            synonyms: Mapping of AYUSH term to allopathic synonyms
+        """
+        table = {}
+        for term, term_synonyms in synonyms.items():
+            term = self.clean_text(term)
+            if term:
+                table.setdefault(term, []).extend(term_synonyms)
+        
+        self.synonyms = table
+        self._synonym_pattern = _compile_terms(table.keys())
+        
+        # Memoized results were computed with the old table
+        if self.cache is not None:
+            self.cache.clear()
+    
     def clean_text(self, text: str) -> str:
         """
         Basic text cleaning
@@ -65,37 +140,32 @@ class MedicalPreprocessor:
         Returns:
             Cleaned text
         """
-        if not text:
-            return ""
-        
-        # Convert to lowercase
-        text = text.lower()
-        
-        # Remove special characters but keep spaces and hyphens
-        text = re.sub(r'[^a-z0-9\s\-]', ' ', text)
-        
-        # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        return text
+        # Lowercase, keep only letters, digits, spaces and hyphens, collapse whitespace
+        return self.normalizer.clean(text)
     
     def expand_ayush_terms(self, text: str) -> str:
         """
         Expand AYUSH terms with allopathic synonyms
         
+        Terms are found in a single pass with the compiled matcher; only
+        whole words match, and overlapping terms resolve to the longest.
+        
         Args:
             text: Input text with AYUSH terms
             
         Returns:
             Text with expanded synonyms
         """
-        text_lower = text.lower()
-        expanded_terms = [text]
+        if self._synonym_pattern is None:
+            return text
+        
+        # Each term is expanded once, in order of first occurrence
+        matched = dict.fromkeys(self._synonym_pattern.findall(text.lower()))
         
-        for ayush_term, synonyms in self.AYUSH_SYNONYMS.items():
-            if ayush_term in text_lower:
-                # Add synonyms to create richer semantic representation
-                expanded_terms.extend(synonyms)
+        expanded_terms = [text]
+        for ayush_term in matched:
+            # Add synonyms to create richer semantic representation
+            expanded_terms.extend(self.synonyms[ayush_term])
         
         return " ".join(expanded_terms)
     
@@ -113,9 +183,20 @@ class MedicalPreprocessor:
             logger.warning("spaCy model not loaded. Skipping lemmatization.")
             return text
         
-        doc = self.nlp(text)
-        lemmas = [token.lemma_ for token in doc if not token.is_stop and not token.is_punct]
+        return self._lemmas(self.nlp(text))
+    
+    @staticmethod
+    def _lemmas(doc) -> str:
+        """
+        Join the lemmas of a spaCy doc, skipping stopwords and punctuation
         
+        Args:
+            doc: spaCy Doc
+            
+        Returns:
+            Lemmatized text
+        """
+        lemmas = [token.lemma_ for token in doc if not token.is_stop and not token.is_punct]
         return " ".join(lemmas)
     
     def remove_medical_stopwords(self, text: str) -> str:
@@ -128,9 +209,7 @@ class MedicalPreprocessor:
         Returns:
             Text without medical stopwords
         """
-        words = text.split()
-        filtered = [w for w in words if w.lower() not in self.MEDICAL_STOPWORDS]
-        return " ".join(filtered)
+        return self.normalizer.remove_stopwords(text)
     
     def preprocess(
         self,
@@ -141,6 +220,9 @@ class MedicalPreprocessor:
         """
         Full preprocessing pipeline
         
+        Results are memoized per (text, expand_synonyms, lemmatize), since
+        the same disease names and symptoms are queried over and over.
+        
         Args:
             text: Input text
             expand_synonyms: Whether to expand AYUSH synonyms
@@ -152,12 +234,24 @@ class MedicalPreprocessor:
         if not text:
             return ""
         
-        # Step 1: Clean text
-        text = self.clean_text(text)
+        if self.cache is None:
+            return self._preprocess(text, expand_synonyms, lemmatize)
         
-        # Step 2: Expand AYUSH terms (if enabled)
-        if expand_synonyms:
-            text = self.expand_ayush_terms(text)
+        key = (text, expand_synonyms, lemmatize)
+        result = self.cache.get(key)
+        if result is None:
+            result = self._preprocess(text, expand_synonyms, lemmatize)
+            self.cache.set(key, result)
+        return result
+    
+    def _preprocess(self, text: str, expand_synonyms: bool, lemmatize: bool) -> str:
+        """Run the uncached preprocessing pipeline on non-empty text"""
+        if not expand_synonyms and not (lemmatize and self.nlp is not None):
+            # Clean and remove stopwords in a single sweep
+            return self.normalizer.normalize(text)
+        
+        # Steps 1-2: Clean text and expand AYUSH terms
+        text = self._prepare(text, expand_synonyms)
         
         # Step 3: Lemmatize (if enabled)
         if lemmatize and self.nlp is not None:
@@ -169,22 +263,175 @@ class MedicalPreprocessor:
         logger.debug(f"Preprocessed text: '{text[:100]}...'")
         return text
     
-    def preprocess_batch(self, texts: List[str]) -> List[str]:
+    def preprocess_batch(
+        self,
+        texts: List[str],
+        expand_synonyms: bool = True,
+        lemmatize: bool = True,
+        batch_size: Optional[int] = None,
+        n_process: int = 1
+    ) -> List[str]:
         """
         Preprocess multiple texts
         
+        Produces the same output as calling preprocess() per text, but runs
+        spaCy over all texts with nlp.pipe instead of one nlp() call each.
+        
         Args:
             texts: List of input texts
+            expand_synonyms: Whether to expand AYUSH synonyms
+            lemmatize: Whether to apply lemmatization
+            batch_size: Texts per nlp.pipe batch (default: from settings)
+            n_process: spaCy worker processes
             
         Returns:
             List of preprocessed texts
         """
-        return [self.preprocess(text) for text in texts]
+        return list(self.preprocess_stream(
+            texts,
+            expand_synonyms=expand_synonyms,
+            lemmatize=lemmatize,
+            batch_size=batch_size,
+            n_process=n_process
+        ))
+    
+    def preprocess_stream(
+        self,
+        texts: Iterable[str],
+        expand_synonyms: bool = True,
+        lemmatize: bool = True,
+        batch_size: Optional[int] = None,
+        n_process: int = 1
+    ) -> Iterator[str]:
+        """
+        Lazily preprocess a stream of texts, yielding results in input order
+        
+        Texts are pulled from the iterable and fed to nlp.pipe in batches, so
+        a consumer (e.g. the embedder) can start on the first results while
+        the rest are still being processed. Results bypass the memo cache.
+        
+        Args:
+            texts: Input texts
+            expand_synonyms: Whether to expand AYUSH synonyms
+            lemmatize: Whether to apply lemmatization
+            batch_size: Texts per nlp.pipe batch (default: from settings)
+            n_process: spaCy worker processes (-1 = all cores); only worth it
+                       for large corpora, since each worker loads the model
+            
+        Yields:
+            Preprocessed texts
+        """
+        prepared = (self._prepare(text, expand_synonyms) if text else "" for text in texts)
+        
+        if lemmatize and self.nlp is not None:
+            docs = self.nlp.pipe(
+                prepared,
+                batch_size=batch_size or settings.preprocess_batch_size,
+                n_process=n_process
+            )
+            prepared = (self._lemmas(doc) for doc in docs)
+        
+        for text in prepared:
+            yield self.remove_medical_stopwords(text)
+    
+    def _prepare(self, text: str, expand_synonyms: bool) -> str:
+        """
+        Clean text and optionally expand AYUSH terms
+        
+        Args:
+            text: Input text
+            expand_synonyms: Whether to expand AYUSH synonyms
+            
+        Returns:
+            Text ready for lemmatization
+        """
+        text = self.clean_text(text)
+        if expand_synonyms:
+            text = self.expand_ayush_terms(text)
+        return text
+    
+    def get_cache_stats(self) -> Dict:
+        """
+        Get memo cache statistics
+        
+        Returns:
+            Dictionary with hit/miss counts (all zero when memoization is off)
+        """
+        if self.cache is None:
+            return LRUCache(max_entries=0).get_stats()
+        return self.cache.get_stats()
+    
+    def fingerprint(self) -> str:
+        """
+        Fingerprint of everything that affects the preprocessing output
+        
+        Covers the pipeline version, stopwords, the loaded synonym table and
+        the loaded spaCy model, so embedding caches can detect stale vectors.
+        
+        Returns:
+            Hex digest identifying the current pipeline configuration
+        """
+        spacy_model = ""
+        if self.nlp is not None:
+            spacy_model = f"{self.nlp.meta.get('name', '')}-{self.nlp.meta.get('version', '')}"
+        
+        payload = json.dumps({
+            "version": self.PIPELINE_VERSION,
+            "stopwords": sorted(self.MEDICAL_STOPWORDS),
+            "synonyms": self.synonyms,
+            "spacy_model": spacy_model
+        }, sort_keys=True)
+        
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
     
     def is_loaded(self) -> bool:
         """Check if spaCy model is loaded"""
         return self.nlp is not None
 
 
+def _compile_terms(terms: Iterable[str]) -> Optional[Pattern]:
+    """
+    Compile terms into one whole-word regex structured as a character trie
+    
+    Terms sharing a prefix share a branch, so matching costs one pass over
+    the text regardless of how many terms there are, and optional suffixes
+    are greedy, so the longest term wins at each position.
+    
+    Args:
+        terms: Terms to match
+    
+    Returns:
+        Compiled pattern, or None if there are no terms
+    """
+    trie: Dict = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = True
+    
+    if not trie:
+        return None
+    return re.compile(rf"\b{_trie_regex(trie)}\b")
+
+
+def _trie_regex(node: Dict) -> str:
+    """Regex source matching every term stored below a trie node"""
+    branches = [re.escape(char) + _trie_regex(child) for char, child in sorted(node.items()) if char]
+    
+    if not branches:
+        return ""
+    
+    if len(branches) == 1:
+        pattern = branches[0]
+        if "" in node:
+            # A term ends here; longer terms continue optionally
+            pattern = f"(?:{pattern})?"
+        return pattern
+    
+    pattern = f"(?:{'|'.join(branches)})"
+    return pattern + "?" if "" in node else pattern
+
+
 # Global preprocessor instance
 preprocessor = MedicalPreprocessor()
@@ -0,0 +1,362 @@
+"""
+Inverted and prefix indexes for AYUSH code text search
+
+Pure Python with no service dependencies, so it is shared by the full
+service and the lightweight service.
+"""
+
+import math
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+def build_code_index(codes: List[Dict], field: str = 'code') -> Dict[str, Dict]:
+    """
+    Map identifier -> code dictionary for O(1) lookups
+    
+    Args:
+        codes: Code dictionaries
+        field: Identifier field to index (e.g. 'code' or 'namc_id')
+    
+    Returns:
+        Dictionary keyed by identifier; the first code wins on duplicates,
+        matching what a linear scan would return
+    """
+    index = {}
+    for code in codes:
+        key = code.get(field)
+        if key and key not in index:
+            index[key] = code
+    return index
+
+
+class AyushSearchIndex:
+    """
+    Substring search over AYUSH codes backed by token and trigram indexes
+    
+    A code matches when the query (lowercased) is a substring of its
+    searchable text: the lowercased name, English name, diacritical name,
+    description and code, joined by spaces. Each search intersects posting
+    lists to find a small candidate set, then verifies candidates with a
+    substring check, so results and totals are exact and in dataset order.
+    
+    Posting lists hold row indices into the code list passed to build():
+    
+    - trigram -> rows whose text contains the trigram
+    - token -> rows containing the whitespace-delimited token; used for the
+      inner words of multi-word queries, which must appear as whole tokens
+    - category -> rows in the category; category-filtered searches only
+      consider these rows, and facet counts come from their lengths
+    """
+    
+    SEARCH_FIELDS = ('name', 'name_english', 'name_diacritical', 'description', 'code')
+    NGRAM = 3
+    
+    # Candidate lists shorter than this are verified directly
+    INTERSECT_MIN_CANDIDATES = 32
+    # Lists this many times longer than the candidates are left to verification
+    INTERSECT_MAX_RATIO = 4
+    
+    def __init__(self, codes: Optional[List[Dict]] = None):
+        """
+        Initialize the index
+        
+        Args:
+            codes: AYUSH code dictionaries to index right away
+        """
+        self.texts: List[str] = []
+        self.categories: List[str] = []
+        self.ngram_postings: Dict[str, array] = {}
+        self.token_postings: Dict[str, array] = {}
+        self.category_rows: Dict[str, array] = {}
+        
+        if codes is not None:
+            self.build(codes)
+    
+    def build(self, codes: List[Dict]):
+        """
+        Build the indexes
+        
+        Args:
+            codes: AYUSH code dictionaries
+        """
+        self.texts = [self.searchable_text(code) for code in codes]
+        self.categories = [code.get('category') for code in codes]
+        self.ngram_postings = {}
+        self.token_postings = {}
+        self.category_rows = {}
+        
+        n = self.NGRAM
+        for row, text in enumerate(self.texts):
+            category = self.categories[row]
+            if category:
+                self.category_rows.setdefault(category, array('I')).append(row)
+            
+            # Rows are appended in order, so every posting list stays sorted
+            for gram in {text[i:i + n] for i in range(len(text) - n + 1)}:
+                postings = self.ngram_postings.get(gram)
+                if postings is None:
+                    postings = self.ngram_postings[gram] = array('I')
+                postings.append(row)
+            
+            for token in set(text.split()):
+                postings = self.token_postings.get(token)
+                if postings is None:
+                    postings = self.token_postings[token] = array('I')
+                postings.append(row)
+    
+    @classmethod
+    def searchable_text(cls, code: Dict) -> str:
+        """
+        Text a query is matched against
+        
+        Args:
+            code: AYUSH code dictionary
+        
+        Returns:
+            Lowercased concatenation of the search fields
+        """
+        return " ".join(code.get(field, '') for field in cls.SEARCH_FIELDS).lower()
+    
+    def search(self, query: str, category: Optional[str] = None) -> List[int]:
+        """
+        Find all codes whose searchable text contains the query
+        
+        Args:
+            query: Search query text
+            category: Optional category filter
+        
+        Returns:
+            Matching row indices, in dataset order
+        """
+        query = query.lower()
+        
+        category_rows = None
+        if category:
+            category_rows = self.category_rows.get(category)
+            if category_rows is None:
+                return []
+        
+        candidates = self._candidates(query, category_rows)
+        if candidates is None:
+            candidates = range(len(self.texts))
+        
+        texts = self.texts
+        if category:
+            categories = self.categories
+            return [row for row in candidates if categories[row] == category and query in texts[row]]
+        return [row for row in candidates if query in texts[row]]
+    
+    def _candidates(self, query: str, restrict: Optional[Sequence[int]] = None) -> Optional[Sequence[int]]:
+        """
+        Rows that may contain the query, from posting-list intersections
+        
+        Args:
+            query: Lowercased query
+            restrict: Optional sorted rows the results must come from
+        
+        Returns:
+            Sorted candidate rows (a superset of the matches), or None when
+            the query is too short to use the indexes and nothing restricts it
+        """
+        n = self.NGRAM
+        grams = {query[i:i + n] for i in range(len(query) - n + 1)}
+        
+        # Inner words are bounded by whitespace on both sides, so they are
+        # whole tokens of any matching text; the outer words may be partial
+        tokens = set(query.split()[1:-1])
+        
+        if not grams and not tokens:
+            return restrict
+        
+        postings = [] if restrict is None else [restrict]
+        for gram in grams:
+            postings.append(self.ngram_postings.get(gram, ()))
+        for token in tokens:
+            postings.append(self.token_postings.get(token, ()))
+        postings.sort(key=len)
+        
+        # Intersect shortest lists first while that is cheaper than
+        # verifying the remaining candidates directly
+        candidates = postings[0]
+        for other in postings[1:]:
+            if len(candidates) < self.INTERSECT_MIN_CANDIDATES \
+                    or len(other) > self.INTERSECT_MAX_RATIO * len(candidates):
+                break
+            candidates = sorted(set(candidates).intersection(other))
+        return candidates
+    
+    def category_counts(self) -> Dict[str, int]:
+        """
+        Number of codes per category
+        
+        Returns:
+            Dictionary of category -> code count, sorted by category name
+        """
+        return {category: len(self.category_rows[category]) for category in sorted(self.category_rows)}
+    
+    def __len__(self) -> int:
+        return len(self.texts)
+    
+    def get_stats(self) -> Dict:
+        """
+        Get index statistics
+        
+        Returns:
+            Dictionary with document, trigram, token and category counts
+        """
+        return {
+            "documents": len(self.texts),
+            "ngrams": len(self.ngram_postings),
+            "tokens": len(self.token_postings),
+            "categories": len(self.category_rows)
+        }
+
+
+class PrefixSuggester:
+    """
+    Autocomplete over AYUSH code names using a sorted term array
+    
+    Every name, English name, diacritical name and code becomes a
+    lowercased term; terms are kept sorted, so the terms starting with a
+    prefix form one contiguous range found with two binary searches.
+    Completions are ranked by a weight precomputed at build time (field
+    weight plus log-scaled popularity). Prefixes matching many terms have
+    their ranked completions precomputed as well, so no lookup ever ranks
+    more than LARGE_RANGE terms.
+    """
+    
+    # Field weights: a match on the primary name ranks above one on the code
+    FIELD_WEIGHTS = {
+        'name': 1.0,
+        'name_english': 0.9,
+        'name_diacritical': 0.8,
+        'code': 0.5
+    }
+    
+    # Ranges with more terms than this get precomputed completions
+    LARGE_RANGE = 256
+    
+    def __init__(self, max_results: int = 20):
+        """
+        Initialize the suggester
+        
+        Args:
+            max_results: Maximum completions returned (and precomputed) per prefix
+        """
+        self.max_results = max_results
+        self.terms: List[str] = []
+        self.rows = array('I')
+        self.fields: List[str] = []
+        self.weights = array('d')
+        self.precomputed: Dict[str, List[int]] = {}
+    
+    def build(self, codes: List[Dict], popularity: Optional[Dict[str, float]] = None):
+        """
+        Build the sorted term array and precompute completions for busy prefixes
+        
+        Args:
+            codes: AYUSH code dictionaries
+            popularity: Optional usage count per code (e.g. feedback received)
+        """
+        popularity = popularity or {}
+        entries = []
+        for row, code in enumerate(codes):
+            boost = math.log1p(popularity.get(code.get('code'), 0))
+            seen = set()
+            for field, field_weight in self.FIELD_WEIGHTS.items():
+                term = " ".join((code.get(field) or '').lower().split())
+                if term and term not in seen:
+                    seen.add(term)
+                    entries.append((term, row, field, field_weight + boost))
+        entries.sort(key=lambda entry: entry[0])
+        
+        self.terms = [entry[0] for entry in entries]
+        self.rows = array('I', (entry[1] for entry in entries))
+        self.fields = [entry[2] for entry in entries]
+        self.weights = array('d', (entry[3] for entry in entries))
+        
+        self.precomputed = {}
+        self._precompute("", 0, len(self.terms))
+    
+    def _precompute(self, prefix: str, lo: int, hi: int):
+        """
+        Precompute completions for a prefix range and its busy sub-prefixes
+        
+        Args:
+            prefix: Prefix shared by terms[lo:hi]
+            lo: Start of the range
+            hi: End of the range
+        """
+        if hi - lo <= self.LARGE_RANGE:
+            return
+        
+        self.precomputed[prefix] = self._rank(lo, hi, self.max_results)
+        
+        # Split the range by the next character; terms equal to the prefix sort first
+        depth = len(prefix)
+        start = lo
+        while start < hi and len(self.terms[start]) == depth:
+            start += 1
+        while start < hi:
+            child = self.terms[start][:depth + 1]
+            end = bisect_left(self.terms, child + "\uffff", start, hi)
+            self._precompute(child, start, end)
+            start = end
+    
+    def _rank(self, lo: int, hi: int, limit: int) -> List[int]:
+        """
+        Best-weighted entries of a range, at most one per code
+        
+        Args:
+            lo: Start of the range
+            hi: End of the range
+            limit: Maximum entries
+        
+        Returns:
+            Entry positions, best first
+        """
+        terms, weights = self.terms, self.weights
+        order = sorted(range(lo, hi), key=lambda i: (-weights[i], len(terms[i]), terms[i]))
+        
+        ranked = []
+        seen_rows = set()
+        for i in order:
+            row = self.rows[i]
+            if row not in seen_rows:
+                seen_rows.add(row)
+                ranked.append(i)
+                if len(ranked) == limit:
+                    break
+        return ranked
+    
+    def suggest(self, prefix: str, limit: int = 10) -> List[Tuple[int, str, str, float]]:
+        """
+        Complete a prefix
+        
+        Args:
+            prefix: Typed text (case and surrounding whitespace are ignored)
+            limit: Maximum completions (capped at max_results)
+        
+        Returns:
+            List of (row index, matched term, field, weight), best first
+        """
+        prefix = " ".join(prefix.lower().split())
+        if not prefix:
+            return []
+        limit = min(limit, self.max_results)
+        
+        positions = self.precomputed.get(prefix)
+        if positions is None:
+            lo = bisect_left(self.terms, prefix)
+            hi = bisect_left(self.terms, prefix + "\uffff", lo)
+            positions = self._rank(lo, hi, limit)
+        
+        return [
+            (self.rows[i], self.terms[i], self.fields[i], self.weights[i])
+            for i in positions[:limit]
+        ]
+    
+    def __len__(self) -> int:
+        return len(self.terms)
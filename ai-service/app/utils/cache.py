@@ -0,0 +1,291 @@
+"""
+Query result caching: in-process LRU with an optional Redis tier
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+import numpy as np
+
+from app.config import settings
+from app.utils.logger import logger
+
+
+class LRUCache:
+    """
+    Bounded, thread-safe least-recently-used cache with optional TTL
+    """
+    
+    def __init__(self, max_entries: int = 10000, ttl: Optional[float] = None):
+        """
+        Initialize the cache
+        
+        Args:
+            max_entries: Maximum number of entries before evicting the oldest
+            ttl: Entry lifetime in seconds (None = no expiry)
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: Any) -> Optional[Any]:
+        """
+        Look up a key, marking it as recently used
+        
+        Args:
+            key: Cache key
+        
+        Returns:
+            Cached value, or None on a miss or expired entry
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def set(self, key: Any, value: Any):
+        """
+        Store a value, evicting the least recently used entry when full
+        
+        Args:
+            key: Cache key
+            value: Value to store
+        """
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get_stats(self) -> Dict:
+        """
+        Get cache statistics
+        
+        Returns:
+            Dictionary with size, hit/miss/eviction counts and hit rate
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+class QueryCache:
+    """
+    Two-tier cache: in-process LRU in front of an optional shared Redis tier
+    
+    Lookups try the local LRU first, then Redis; Redis hits are copied into
+    the LRU. Redis errors are logged and treated as misses, so an
+    unavailable Redis only costs hit rate, never a failed request.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = 10000,
+        ttl: Optional[int] = None,
+        dumps: Callable[[Any], bytes] = None,
+        loads: Callable[[bytes], Any] = None
+    ):
+        """
+        Initialize the cache
+        
+        Args:
+            name: Cache name, used as the Redis key prefix
+            max_entries: Capacity of the in-process LRU
+            ttl: Entry lifetime in seconds for both tiers
+            dumps: Serializer for the Redis tier (default: JSON)
+            loads: Deserializer for the Redis tier (default: JSON)
+        """
+        self.name = name
+        self.ttl = ttl
+        self.local = LRUCache(max_entries=max_entries, ttl=ttl)
+        self.redis = None
+        self.dumps = dumps or (lambda value: json.dumps(value).encode("utf-8"))
+        self.loads = loads or json.loads
+        
+        self.redis_hits = 0
+        self.redis_misses = 0
+        self.redis_errors = 0
+    
+    def attach_redis(self, client):
+        """
+        Use a Redis client as the shared second tier
+        
+        Args:
+            client: redis.asyncio.Redis compatible client (get/set), or None
+        """
+        self.redis = client
+    
+    def make_key(self, *parts: Any) -> str:
+        """
+        Build a compact cache key from its parts
+        
+        Args:
+            *parts: Key components (joined and hashed)
+        
+        Returns:
+            Key of the form '<name>:<digest>'
+        """
+        payload = "\x1f".join(str(part) for part in parts)
+        return f"{self.name}:{hashlib.sha1(payload.encode('utf-8')).hexdigest()}"
+    
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a key in the local tier, then in Redis
+        
+        Args:
+            key: Key from make_key()
+        
+        Returns:
+            Cached value or None
+        """
+        value = self.local.get(key)
+        if value is not None or self.redis is None:
+            return value
+        
+        try:
+            raw = await self.redis.get(key)
+        except Exception as e:
+            self.redis_errors += 1
+            logger.warning(f"Redis get failed for {self.name} cache: {e}")
+            return None
+        
+        if raw is None:
+            self.redis_misses += 1
+            return None
+        
+        self.redis_hits += 1
+        value = self.loads(raw)
+        self.local.set(key, value)
+        return value
+    
+    async def set(self, key: str, value: Any):
+        """
+        Store a value in both tiers
+        
+        Args:
+            key: Key from make_key()
+            value: Value to cache
+        """
+        self.local.set(key, value)
+        if self.redis is None:
+            return
+        
+        try:
+            await self.redis.set(key, self.dumps(value), ex=self.ttl or None)
+        except Exception as e:
+            self.redis_errors += 1
+            logger.warning(f"Redis set failed for {self.name} cache: {e}")
+    
+    def get_stats(self) -> Dict:
+        """
+        Get statistics for both tiers
+        
+        Returns:
+            Dictionary with local LRU stats and Redis hit/miss/error counts
+        """
+        return {
+            "local": self.local.get_stats(),
+            "redis_enabled": self.redis is not None,
+            "redis_hits": self.redis_hits,
+            "redis_misses": self.redis_misses,
+            "redis_errors": self.redis_errors
+        }
+
+
+def normalize_query(text: Optional[str]) -> str:
+    """
+    Normalize query text for cache keys (case and whitespace insensitive)
+    
+    Args:
+        text: Raw query text
+    
+    Returns:
+        Normalized text
+    """
+    return " ".join((text or "").lower().split())
+
+
+def array_to_bytes(array: np.ndarray) -> bytes:
+    """Serialize a float32 vector for the Redis tier"""
+    return np.asarray(array, dtype=np.float32).tobytes()
+
+
+def bytes_to_array(raw: bytes) -> np.ndarray:
+    """Deserialize a float32 vector from the Redis tier"""
+    return np.frombuffer(raw, dtype=np.float32)
+
+
+def create_redis_client():
+    """
+    Create an asyncio Redis client from settings
+    
+    Returns:
+        redis.asyncio.Redis client, or None if Redis is disabled or unavailable
+    """
+    if not settings.redis_enabled:
+        return None
+    
+    try:
+        import redis.asyncio as redis
+    except ImportError:
+        logger.warning("Redis enabled but the redis package is not installed; using local cache only")
+        return None
+    
+    logger.info(f"Using Redis cache at {settings.redis_host}:{settings.redis_port}/{settings.redis_db}")
+    return redis.Redis(
+        host=settings.redis_host,
+        port=settings.redis_port,
+        db=settings.redis_db,
+        password=settings.redis_password or None
+    )
+
+
+# Global cache instances
+result_cache = QueryCache(
+    "result",
+    max_entries=settings.cache_max_entries,
+    ttl=settings.cache_ttl
+)
+embedding_cache = QueryCache(
+    "embedding",
+    max_entries=settings.cache_max_entries,
+    ttl=settings.cache_ttl,
+    dumps=array_to_bytes,
+    loads=bytes_to_array
+)
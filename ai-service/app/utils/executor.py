@@ -0,0 +1,185 @@
+"""
+Dedicated executor for CPU-bound inference work
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+from app.config import settings
+from app.utils.logger import logger
+
+
+class ServiceOverloadedError(Exception):
+    """Raised when the inference queue is full and a job is rejected"""
+
+
+class InferenceExecutor:
+    """
+    Runs preprocessing, embedding and scoring off the event loop
+    
+    Jobs run on a fixed-size thread pool, so a slow inference call never
+    blocks the event loop (health checks and other requests stay
+    responsive). spaCy, PyTorch and NumPy release the GIL in their hot
+    loops, so threads give real parallelism. The number of jobs admitted
+    (running + queued) is capped; beyond that, new jobs are rejected with
+    ServiceOverloadedError instead of queueing without bound.
+    """
+    
+    def __init__(
+        self,
+        workers: int = 2,
+        max_pending: int = 64,
+        intra_op_threads: int = 0
+    ):
+        """
+        Initialize the executor
+        
+        Args:
+            workers: Number of inference threads
+            max_pending: Maximum running + queued jobs before rejecting
+            intra_op_threads: Threads each torch/BLAS op may use (0 = library default)
+        """
+        self.workers = workers
+        self.max_pending = max_pending
+        self.intra_op_threads = intra_op_threads
+        
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self.pending = 0
+        self.completed_total = 0
+        self.rejected_total = 0
+    
+    def start(self):
+        """Create the thread pool and apply intra-op thread limits"""
+        if self._pool is not None:
+            return
+        
+        if self.intra_op_threads > 0:
+            self._limit_intra_op_threads(self.intra_op_threads)
+        
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.workers,
+            thread_name_prefix="inference"
+        )
+        logger.info(
+            f"Inference executor started ({self.workers} workers, "
+            f"max {self.max_pending} pending jobs)"
+        )
+    
+    def shutdown(self):
+        """Wait for running jobs and release the thread pool"""
+        if self._pool is None:
+            return
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self._pool = None
+        logger.info("Inference executor stopped")
+    
+    @staticmethod
+    def _limit_intra_op_threads(threads: int):
+        """
+        Cap the threads used inside a single torch or BLAS operation
+        
+        With several inference workers, letting every op spawn one thread
+        per core oversubscribes the CPU, so each op is limited instead.
+        
+        Args:
+            threads: Threads per operation
+        """
+        for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+            os.environ.setdefault(var, str(threads))
+        
+        try:
+            import torch
+            torch.set_num_threads(threads)
+        except ImportError:
+            pass
+        
+        try:
+            from threadpoolctl import threadpool_limits
+            threadpool_limits(limits=threads)
+        except ImportError:
+            pass
+    
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run a blocking function on the inference pool
+        
+        Runs inline if the executor has not been started.
+        
+        Args:
+            fn: Function to call
+            *args: Positional arguments
+            **kwargs: Keyword arguments
+        
+        Returns:
+            The function's return value
+        
+        Raises:
+            ServiceOverloadedError: If max_pending jobs are already admitted
+        """
+        if self._pool is None:
+            return fn(*args, **kwargs)
+        
+        if self.pending >= self.max_pending:
+            self.rejected_total += 1
+            raise ServiceOverloadedError(
+                f"Inference queue full ({self.pending} pending jobs), try again later"
+            )
+        
+        return await self._dispatch(fn, *args, **kwargs)
+    
+    async def run_admitted(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run a blocking function on the inference pool without admission control
+        
+        For work on behalf of requests that were already admitted (e.g. a
+        coalesced embedding batch), which must not be rejected halfway.
+        
+        Args:
+            fn: Function to call
+            *args: Positional arguments
+            **kwargs: Keyword arguments
+            
+        Returns:
+            The function's return value
+        """
+        if self._pool is None:
+            return fn(*args, **kwargs)
+        
+        return await self._dispatch(fn, *args, **kwargs)
+    
+    async def _dispatch(self, fn: Callable, *args, **kwargs) -> Any:
+        """Submit a job to the pool and track it as pending until it finishes"""
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool, partial(fn, *args, **kwargs))
+        finally:
+            self.pending -= 1
+            self.completed_total += 1
+    
+    def get_stats(self) -> Dict:
+        """
+        Get executor statistics
+        
+        Returns:
+            Dictionary with pool size, pending jobs and rejection counts
+        """
+        return {
+            "enabled": self._pool is not None,
+            "workers": self.workers,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "completed_total": self.completed_total,
+            "rejected_total": self.rejected_total
+        }
+
+
+# Global executor instance
+inference_executor = InferenceExecutor(
+    workers=settings.inference_workers,
+    max_pending=settings.inference_max_pending,
+    intra_op_threads=settings.inference_intra_op_threads
+)
@@ -0,0 +1,335 @@
+"""
+Append-only JSON Lines store for doctor feedback
+"""
+
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, single process only
+    fcntl = None
+
+from app.config import settings
+from app.utils.logger import logger
+
+
+ID_PATTERN = re.compile(r"^FB-(\d+)$")
+
+
+class FeedbackStore:
+    """
+    Feedback records appended to a JSON Lines file by a single writer task
+    
+    Each record is one line, so saving feedback costs the same no matter
+    how much history the file holds. Callers queue their record and wait
+    for the writer task, which drains everything queued, writes it in one
+    call and fsyncs once, so concurrent submissions share a disk flush
+    instead of racing on the file.
+    
+    IDs are assigned by the writer while it holds an exclusive flock on
+    the log: it first reads whatever other processes (e.g. other uvicorn
+    workers) appended since its last write, continues from the highest ID
+    seen, then appends. IDs therefore stay unique across processes
+    sharing the file.
+    
+    Records read that way (and by refresh(), which picks up other
+    processes' appends between writes) are passed to subscribers, so
+    in-memory views such as the re-ranking index see every worker's
+    feedback, not only their own.
+    """
+    
+    def __init__(self, path: str, max_batch_size: int = 256):
+        """
+        Initialize the store
+        
+        Args:
+            path: JSON Lines file
+            max_batch_size: Maximum records written per fsync
+        """
+        self.path = Path(path)
+        self.max_batch_size = max_batch_size
+        
+        self._file = None
+        self._next_id: Optional[int] = None
+        self._scanned_offset = 0
+        self._scan_lock = threading.Lock()
+        self._listeners: List[Callable[[Dict], None]] = []
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        
+        # Metrics
+        self.records_total = 0
+        self.flushes_total = 0
+    
+    @property
+    def is_running(self) -> bool:
+        """Whether the background writer task is active"""
+        return self._task is not None and not self._task.done()
+    
+    def start(self):
+        """Open the file and start the writer task on the running event loop"""
+        if self.is_running:
+            return
+        if self._file is None:
+            self._open()
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        logger.info(f"Feedback store started ({self.path}, next ID {self._format_id(self._next_id)})")
+    
+    async def stop(self):
+        """Write any queued records, then stop the writer task and close the file"""
+        if not self.is_running:
+            return
+        
+        # Records queued before the sentinel are still written
+        await self._queue.put(None)
+        await self._task
+        
+        self._task = None
+        self._file.close()
+        self._file = None
+        logger.info("Feedback store stopped")
+    
+    async def append(self, fields: Dict) -> Dict:
+        """
+        Timestamp a feedback record and persist it
+        
+        The ID is assigned when the record is written. Writes synchronously
+        when the writer task is not running.
+        
+        Args:
+            fields: Record fields (without 'id' and 'timestamp')
+        
+        Returns:
+            The stored record
+        """
+        if self._file is None:
+            self._open()
+        
+        record = {"id": None, "timestamp": time.time(), **fields}
+        
+        if not self.is_running:
+            self._write_batch([(record, None)])
+            return record
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((record, future))
+        await future
+        return record
+    
+    def iter_records(self) -> Iterator[Dict]:
+        """
+        Read stored records in insertion order, up to the last scan
+        
+        Records appended after the last scan are delivered to subscribers
+        by the next refresh() or write instead, so a caller that reads
+        the log and then subscribes sees every record exactly once.
+        Skips lines that do not parse (e.g. a write cut short by a crash).
+        
+        Yields:
+            Feedback record dictionaries
+        """
+        if self._file is None:
+            self._open()
+        with self._scan_lock:
+            end = self._scanned_offset
+        
+        position = 0
+        with open(self.path, 'rb') as f:
+            for line_number, line in enumerate(f, start=1):
+                position += len(line)
+                if position > end:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except (ValueError, UnicodeDecodeError):
+                    logger.warning(f"Skipping unreadable feedback record at {self.path}:{line_number}")
+    
+    def subscribe(self, listener: Callable[[Dict], None]):
+        """
+        Receive records other processes append to the log
+        
+        Args:
+            listener: Called with each record found by a later scan
+        """
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+    
+    def refresh(self):
+        """Pass records other processes appended since the last scan to subscribers"""
+        if self._file is None or os.fstat(self._file.fileno()).st_size == self._scanned_offset:
+            return
+        with self._scan_lock:
+            self._scan_new_records()
+    
+    def _open(self):
+        """Migrate a legacy JSON array, find the next ID and open the file for appending"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'ab')
+        
+        with self._locked():
+            self._migrate_legacy()
+            
+            # Start on a fresh line if the last write was cut short
+            end = self._file.seek(0, os.SEEK_END)
+            if end > 0:
+                with open(self.path, 'rb') as f:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        self._file.write(b"\n")
+                        self._file.flush()
+            
+            with self._scan_lock:
+                self._next_id = 1
+                self._scanned_offset = 0
+                self._scan_new_records(notify=False)
+    
+    @contextmanager
+    def _locked(self):
+        """Hold an exclusive lock on the log file (shared by all processes)"""
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+    
+    def _scan_new_records(self, notify: bool = True):
+        """
+        Read records appended since the last scan (scan lock held)
+        
+        Advances the next ID past them and, unless notify is False, passes
+        them to subscribers.
+        """
+        records = []
+        with open(self.path, 'rb') as f:
+            f.seek(self._scanned_offset)
+            for line in f:
+                # A line without a newline is still being written elsewhere
+                if not line.endswith(b"\n"):
+                    break
+                self._scanned_offset += len(line)
+                try:
+                    record = json.loads(line)
+                    match = ID_PATTERN.match(str(record.get("id", "")))
+                except (ValueError, AttributeError):
+                    continue
+                records.append(record)
+                if match:
+                    self._next_id = max(self._next_id, int(match.group(1)) + 1)
+        
+        if notify:
+            for record in records:
+                for listener in self._listeners:
+                    listener(record)
+    
+    def _migrate_legacy(self):
+        """
+        Convert feedback.json (one JSON array) next to the log into JSON Lines
+        
+        Runs while the log is empty and the legacy file exists, with the
+        log lock held so only one process migrates; the legacy file is then
+        renamed to feedback.json.migrated so it is not converted again.
+        """
+        legacy_path = self.path.with_suffix(".json")
+        if legacy_path == self.path or not legacy_path.exists() or self._file.seek(0, os.SEEK_END) > 0:
+            return
+        
+        try:
+            with open(legacy_path, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not migrate legacy feedback file {legacy_path}: {e}")
+            return
+        
+        self._file.write(b"".join(json.dumps(record).encode('utf-8') + b"\n" for record in records))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        legacy_path.rename(legacy_path.with_name(legacy_path.name + ".migrated"))
+        logger.info(f"Migrated {len(records)} feedback records from {legacy_path} to {self.path}")
+    
+    async def _run(self):
+        """Write and fsync queued records until the stop sentinel arrives"""
+        loop = asyncio.get_running_loop()
+        stopping = False
+        
+        while not stopping:
+            batch = [await self._queue.get()]
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            
+            stopping = None in batch
+            batch = [item for item in batch if item is not None]
+            if not batch:
+                continue
+            
+            try:
+                # Disk I/O runs off the event loop; new records queue meanwhile
+                await loop.run_in_executor(None, self._write_batch, batch)
+            except Exception as e:
+                logger.error(f"Writing {len(batch)} feedback records failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+    
+    def _write_batch(self, batch: List[tuple]):
+        """
+        Assign IDs, append records and fsync once, under the file lock
+        
+        Args:
+            batch: List of (record, future) tuples
+        """
+        with self._locked(), self._scan_lock:
+            self._scan_new_records()
+            for record, _ in batch:
+                record["id"] = self._format_id(self._next_id)
+                self._next_id += 1
+            
+            data = b"".join(json.dumps(record).encode('utf-8') + b"\n" for record, _ in batch)
+            self._file.write(data)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._scanned_offset = os.fstat(self._file.fileno()).st_size
+        self.records_total += len(batch)
+        self.flushes_total += 1
+    
+    @staticmethod
+    def _format_id(number: int) -> str:
+        """Feedback ID for a sequence number"""
+        return f"FB-{number:04d}"
+    
+    def get_stats(self) -> Dict:
+        """
+        Get feedback store statistics
+        
+        Returns:
+            Dictionary with queue depth and write counts
+        """
+        return {
+            "enabled": self.is_running,
+            "path": str(self.path),
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "records_written": self.records_total,
+            "flushes": self.flushes_total,
+            "avg_records_per_flush": round(self.records_total / self.flushes_total, 2) if self.flushes_total else 0.0
+        }
+
+
+# Global feedback store instance
+feedback_store = FeedbackStore(settings.feedback_data_path)
@@ -0,0 +1,29 @@
+"""
+File utilities for AI/NLP Service
+"""
+
+import os
+from contextlib import contextmanager
+from pathlib import Path
+
+
+@contextmanager
+def atomic_open(path: Path, mode: str):
+    """
+    Open a temporary sibling of path for writing and rename it into place on success
+    
+    Args:
+        path: Final file path
+        mode: File mode ('w' or 'wb')
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, mode) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
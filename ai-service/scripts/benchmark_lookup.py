@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for AYUSH code lookup by identifier.
+
+Compares the previous linear scan over the code list (as in
+GET /ayush/{code}) with the dictionary index built at load time, for
+single lookups and for resolving a batch of codes (as in POST /ayush/lookup).
+
+Usage:
+    python scripts/benchmark_lookup.py [--lookups 2000] [--batch 50]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.search_index import build_code_index  # noqa: E402
+
+
+CORPUS_SIZES = [1_000, 7_000, 50_000]
+
+
+def linear_lookup(codes: list, code: str):
+    """Previous implementation: scan until the code matches"""
+    for ayush_code in codes:
+        if ayush_code.get('code') == code:
+            return ayush_code
+    return None
+
+
+def time_per_call(fn, args: list) -> float:
+    """Mean latency of fn over all arguments, in microseconds"""
+    start = time.perf_counter()
+    for arg in args:
+        fn(arg)
+    return (time.perf_counter() - start) * 1e6 / len(args)
+
+
+def main():
+    """Run the benchmark and print a latency table"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--lookups", type=int, default=2000, help="Lookups per corpus size")
+    parser.add_argument("--batch", type=int, default=50, help="Codes per bulk lookup")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+
+    print(f"lookups={args.lookups} batch={args.batch}\n")
+    print(f"{'corpus rows':>12} {'operation':>10} {'scan us':>10} {'index us':>10} {'speedup':>9}")
+    print("-" * 55)
+
+    for n_rows in CORPUS_SIZES:
+        codes = [{"code": f"AYU-{i:06d}", "namc_id": f"N{i}", "name": f"term {i}"} for i in range(n_rows)]
+        index = build_code_index(codes, 'code')
+
+        # Mostly existing codes, some misses (worst case for the scan)
+        queries = [f"AYU-{rng.randrange(int(n_rows * 1.1)):06d}" for _ in range(args.lookups)]
+        batches = [queries[i:i + args.batch] for i in range(0, len(queries), args.batch)]
+
+        for query in queries[:100]:
+            assert index.get(query) is linear_lookup(codes, query)
+
+        cases = [
+            ("single", queries, lambda q: linear_lookup(codes, q), index.get),
+            ("bulk", batches,
+             lambda batch: [linear_lookup(codes, q) for q in batch],
+             lambda batch: [index.get(q) for q in batch]),
+        ]
+        for label, inputs, scan, indexed in cases:
+            scan_us = time_per_call(scan, inputs[:max(1, len(inputs) // 10)])
+            index_us = time_per_call(indexed, inputs)
+            print(f"{n_rows:>12,} {label:>10} {scan_us:>10.1f} {index_us:>10.2f} {scan_us / index_us:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
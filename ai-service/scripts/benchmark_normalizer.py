@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for text cleaning and stopword removal throughput.
+
+Compares the previous regex-based clean_text / remove_medical_stopwords
+(two re.sub calls, then a split/lower/join per call) with TextNormalizer
+(str.translate character filter, single split) on synthetic medical
+strings, and checks that both produce identical output.
+
+Usage:
+    python scripts/benchmark_normalizer.py [--strings 100000]
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.normalizer import TextNormalizer  # noqa: E402
+
+
+STOPWORDS = {
+    'patient', 'disease', 'condition', 'syndrome', 'disorder',
+    'symptoms', 'signs', 'diagnosis', 'treatment', 'therapy'
+}
+
+VOCABULARY = [
+    "Amlapitta", "Jwara", "Kasa", "fever", "chronic", "acid", "reflux", "pain",
+    "joint", "swelling", "Patient", "disease", "symptoms", "with", "and", "of",
+    "(acute)", "type-2", "diabetes,", "GERD;", "cough/cold", "Vata-Kapha", "42",
+]
+
+
+def baseline_clean(text: str) -> str:
+    """Previous MedicalPreprocessor.clean_text"""
+    if not text:
+        return ""
+    text = text.lower()
+    text = re.sub(r'[^a-z0-9\s\-]', ' ', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def baseline_remove_stopwords(text: str) -> str:
+    """Previous MedicalPreprocessor.remove_medical_stopwords"""
+    words = text.split()
+    return " ".join([w for w in words if w.lower() not in STOPWORDS])
+
+
+def corpus(count: int, rng: random.Random) -> list:
+    """Random short medical phrases with mixed case and punctuation"""
+    return [
+        "  ".join(rng.choices(VOCABULARY, k=rng.randint(3, 20)))
+        for _ in range(count)
+    ]
+
+
+def time_total(fn, texts: list) -> float:
+    """Total time of fn over all texts, in milliseconds"""
+    start = time.perf_counter()
+    for text in texts:
+        fn(text)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    """Run the benchmark and print a timing table"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--strings", type=int, default=100_000, help="Number of strings")
+    args = parser.parse_args()
+
+    texts = corpus(args.strings, random.Random(0))
+    normalizer = TextNormalizer(STOPWORDS)
+
+    # Sanity check: identical output
+    for text in texts[:10_000]:
+        assert normalizer.clean(text) == baseline_clean(text), text
+        assert normalizer.remove_stopwords(text) == baseline_remove_stopwords(text), text
+        assert normalizer.normalize(text) == baseline_remove_stopwords(baseline_clean(text)), text
+
+    # Stopword removal runs on cleaned (lowercase) text in the pipeline
+    cleaned = [baseline_clean(text) for text in texts]
+
+    cases = [
+        ("clean", texts, baseline_clean, normalizer.clean),
+        ("stopwords", cleaned, baseline_remove_stopwords, normalizer.remove_stopwords),
+        ("clean+stopwords", texts,
+         lambda text: baseline_remove_stopwords(baseline_clean(text)),
+         normalizer.normalize),
+    ]
+
+    print(f"strings={len(texts):,}\n")
+    print(f"{'operation':>16} {'baseline ms':>12} {'normalizer ms':>14} {'speedup':>8}")
+    print("-" * 54)
+
+    for label, inputs, baseline, fast in cases:
+        baseline_ms = time_total(baseline, inputs)
+        fast_ms = time_total(fast, inputs)
+        print(f"{label:>16} {baseline_ms:>12.1f} {fast_ms:>14.1f} {baseline_ms / fast_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for per-query similarity scoring latency.
+
+Compares the previous approach (sklearn-style cosine_similarity that
+re-normalizes the whole corpus on every query, followed by a full argsort)
+with VectorScorer (corpus normalized once, single matvec into a
+preallocated buffer, argpartition top-k) at several corpus sizes.
+
+Usage:
+    python scripts/benchmark_scoring.py [--dim 384] [--queries 200] [--top-k 5]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models.scoring import VectorScorer  # noqa: E402
+
+
+CORPUS_SIZES = [1_000, 10_000, 100_000]
+
+
+def baseline_search(query: np.ndarray, corpus: np.ndarray, top_k: int) -> np.ndarray:
+    """Previous implementation: normalize everything per query, then full argsort"""
+    query = query.reshape(1, -1).astype(np.float64)
+    query = query / np.linalg.norm(query, axis=1, keepdims=True)
+    corpus = corpus.astype(np.float64)
+    corpus = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+    similarities = (query @ corpus.T)[0]
+    return np.argsort(similarities)[::-1][:top_k]
+
+
+def time_per_query(fn, queries: np.ndarray) -> float:
+    """Mean latency of fn over all queries, in milliseconds"""
+    fn(queries[0])  # warm-up
+    start = time.perf_counter()
+    for query in queries:
+        fn(query)
+    return (time.perf_counter() - start) * 1000 / len(queries)
+
+
+def main():
+    """Run the benchmark and print a latency table"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--dim", type=int, default=384, help="Embedding dimension")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per corpus size")
+    parser.add_argument("--top-k", type=int, default=5, help="Results per query")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+
+    print(f"dim={args.dim} queries={args.queries} top_k={args.top_k}\n")
+    print(f"{'corpus rows':>12} {'baseline ms':>12} {'scorer ms':>10} {'speedup':>8}")
+    print("-" * 46)
+
+    for n_rows in CORPUS_SIZES:
+        corpus = rng.standard_normal((n_rows, args.dim), dtype=np.float32)
+        queries = rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+
+        scorer = VectorScorer()
+        scorer.fit(corpus)
+
+        # Sanity check: both paths agree on the top result
+        assert baseline_search(queries[0], corpus, args.top_k)[0] == \
+            scorer.search(queries[0], args.top_k)[0][0]
+
+        baseline_ms = time_per_query(lambda q: baseline_search(q, corpus, args.top_k), queries)
+        scorer_ms = time_per_query(lambda q: scorer.search(q, args.top_k), queries)
+
+        print(f"{n_rows:>12,} {baseline_ms:>12.3f} {scorer_ms:>10.3f} {baseline_ms / scorer_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
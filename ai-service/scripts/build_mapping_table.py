@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Precompute the NAMASTE to ICD-11 top-k mapping table.
+
+Loads (or encodes) both embedding matrices through the embedding store,
+computes every NAMASTE code's top MAPPING_TABLE_TOP_K ICD-11 matches with
+memory-bounded blocked matrix products and saves the table next to the
+embedding cache. Run it after a dataset or model change so service workers start by
+memory-mapping the table instead of building it.
+
+Usage:
+    python scripts/build_mapping_table.py [--memory-mb 256]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings  # noqa: E402
+from app.models.mapping_table import MappingTable  # noqa: E402
+from app.services.mapping_service import mapping_service  # noqa: E402
+
+
+async def run(args):
+    """Initialize the service without a table, then build and save one"""
+    settings.mapping_table_enabled = False
+    await mapping_service.initialize()
+    try:
+        namaste = mapping_service.namaste_embeddings
+        icd11 = mapping_service.icd11_embeddings
+
+        table = MappingTable(top_k=settings.mapping_table_top_k, memory_mb=args.memory_mb)
+        start = time.perf_counter()
+        table.build(namaste, icd11)
+        elapsed = time.perf_counter() - start
+        table.save(Path(settings.embedding_cache_dir) / "mapping_table")
+
+        size_mb = (table.indices.nbytes + table.scores.nbytes) / 1e6
+        print(f"namaste={namaste.shape[0]:,} icd11={icd11.shape[0]:,} k={table.k} "
+              f"built in {elapsed:.2f}s ({size_mb:.1f} MB)")
+    finally:
+        await mapping_service.shutdown()
+
+
+def main():
+    """Parse arguments and build the table"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--memory-mb", type=float, default=settings.all_pairs_memory_mb, help="Working memory cap (MiB)")
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Bulk cross-mapping: top-k most similar corpus codes for every query code.
+
+Streams all-pairs cosine similarity in memory-bounded blocks (see
+app/models/all_pairs.py), so arbitrarily large code sets can be mapped
+without ever materializing the full similarity matrix. Results are
+written block by block as they are computed.
+
+Inputs are either code sets (JSON arrays of code dictionaries, embedded
+through the cached embedding store) or precomputed .npy embedding
+matrices. Output is JSON Lines for code sets, one line per query code:
+
+    {"code": "AYU-001", "matches": [{"code": "DA63", "score": 0.83}, ...]}
+
+or, for .npy inputs, <out>.indices.npy and <out>.scores.npy (int32/float32,
+shape [n_queries, k]).
+
+Usage:
+    python scripts/cross_map.py --queries data/namaste_codes.json \\
+        --corpus data/icd11_codes.json --out namaste_to_icd11.jsonl --top-k 10
+
+    python scripts/cross_map.py --queries q.npy --corpus c.npy --out results/cross --memory-mb 512
+
+    # Trace allocations while streaming and fail if the peak exceeds the cap
+    python scripts/cross_map.py --queries q.npy --corpus c.npy --out results/cross --check-memory
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings  # noqa: E402
+from app.models.all_pairs import iter_top_k, plan_blocks  # noqa: E402
+
+
+DEFAULT_FIELDS = "name,name_english,description"
+
+
+def load_code_set(path: str, fields: list) -> tuple:
+    """
+    Read a code set and build the text embedded for each code
+
+    Returns:
+        (codes, texts) lists
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        codes = json.load(f)
+    texts = [" ".join(str(code.get(field) or '') for field in fields).strip() for code in codes]
+    return [code.get('code', '') for code in codes], texts
+
+
+def embed_code_sets(paths: list, fields: list) -> list:
+    """Embed code sets through the embedding store (cached under EMBEDDING_CACHE_DIR)"""
+    from app.models.embedder import embedder
+    from app.models.embedding_store import EmbeddingStore
+    from app.services.preprocessing import preprocessor
+
+    preprocessor.load_model()
+    preprocessor.load_synonyms()
+    embedder.load_model()
+
+    def encode(texts):
+        return embedder.encode(preprocessor.preprocess_batch(texts), batch_size=64)
+
+    results = []
+    for path in paths:
+        codes, texts = load_code_set(path, fields)
+        store = EmbeddingStore(
+            f"crossmap_{Path(path).stem}",
+            model_name=embedder.model_name,
+            preprocessor_fingerprint=preprocessor.fingerprint()
+        )
+        results.append((codes, store.load_or_encode(texts, encode)))
+    return results
+
+
+def main():
+    """Embed or load both sides, stream the top-k and write results"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--queries", type=str, required=True, help="Query code set (.json) or embeddings (.npy)")
+    parser.add_argument("--corpus", type=str, required=True, help="Corpus code set (.json) or embeddings (.npy)")
+    parser.add_argument("--out", type=str, required=True, help="Output .jsonl file, or prefix for .npy outputs")
+    parser.add_argument("--top-k", type=int, default=10, help="Matches per query code")
+    parser.add_argument("--memory-mb", type=float, default=settings.all_pairs_memory_mb, help="Working memory cap (MiB)")
+    parser.add_argument("--fields", type=str, default=DEFAULT_FIELDS, help="Code fields embedded, comma-separated")
+    parser.add_argument("--check-memory", action="store_true",
+                        help="Trace allocations while streaming and fail if the peak exceeds --memory-mb")
+    args = parser.parse_args()
+
+    npy_input = args.queries.endswith(".npy")
+    if npy_input != args.corpus.endswith(".npy"):
+        parser.error("--queries and --corpus must both be code sets (.json) or both be embeddings (.npy)")
+    if npy_input:
+        query_codes = corpus_codes = None
+        queries = np.load(args.queries, mmap_mode="r")
+        corpus = np.load(args.corpus, mmap_mode="r")
+    else:
+        (query_codes, queries), (corpus_codes, corpus) = embed_code_sets(
+            [args.queries, args.corpus], args.fields.split(",")
+        )
+
+    k = min(args.top_k, corpus.shape[0])
+    query_rows, corpus_rows = plan_blocks(queries.shape[0], corpus.shape[0], queries.shape[1], args.memory_mb)
+    print(f"queries={queries.shape[0]:,} corpus={corpus.shape[0]:,} k={k} "
+          f"tile={query_rows}x{corpus_rows} memory_cap={args.memory_mb:g}MiB")
+
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    start_time = time.perf_counter()
+    if args.check_memory:
+        tracemalloc.start()
+
+    if npy_input:
+        indices_out = np.lib.format.open_memmap(
+            f"{out}.indices.npy", mode="w+", dtype=np.int32, shape=(queries.shape[0], k)
+        )
+        scores_out = np.lib.format.open_memmap(
+            f"{out}.scores.npy", mode="w+", dtype=np.float32, shape=(queries.shape[0], k)
+        )
+        for start, indices, scores in iter_top_k(queries, corpus, k, args.memory_mb):
+            indices_out[start:start + indices.shape[0]] = indices
+            scores_out[start:start + scores.shape[0]] = scores
+        indices_out.flush()
+        scores_out.flush()
+    else:
+        with open(out, 'w', encoding='utf-8') as f:
+            for start, indices, scores in iter_top_k(queries, corpus, k, args.memory_mb):
+                for offset, (row_indices, row_scores) in enumerate(zip(indices, scores)):
+                    matches = [
+                        {"code": corpus_codes[idx], "score": round(float(score), 4)}
+                        for idx, score in zip(row_indices, row_scores)
+                    ]
+                    f.write(json.dumps({"code": query_codes[start + offset], "matches": matches}) + "\n")
+
+    print(f"Wrote {queries.shape[0]:,} rows to {out} in {time.perf_counter() - start_time:.2f}s")
+
+    if args.check_memory:
+        peak_mb = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+        print(f"Peak working memory {peak_mb:.1f}MiB (cap {args.memory_mb:g}MiB)")
+        if peak_mb > args.memory_mb:
+            sys.exit(f"Peak working memory exceeded the {args.memory_mb:g}MiB cap")
+
+
+if __name__ == "__main__":
+    main()
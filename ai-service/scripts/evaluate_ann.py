@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Recall@k vs. exact search report for the IVF vector index.
+
+Builds an exact index and an IVF index over the same embeddings, then
+sweeps nprobe and reports recall@k (fraction of the exact top-k found)
+and mean per-query latency, so IVF_NLIST / IVF_NPROBE can be chosen
+for the desired operating point.
+
+Usage:
+    # Synthetic clustered corpus
+    python scripts/evaluate_ann.py --rows 100000
+
+    # Real embeddings (e.g. a matrix from data/embeddings/)
+    python scripts/evaluate_ann.py --embeddings data/embeddings/icd11_embeddings.<digest>.npy
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models.ann_index import ExactIndex, IVFIndex  # noqa: E402
+from app.models.scoring import l2_normalize  # noqa: E402
+
+
+NPROBE_SWEEP = [1, 2, 4, 8, 16, 32, 64, 128]
+
+
+def synthetic_corpus(rows: int, dim: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    """Gaussian mixture on the unit sphere, loosely resembling text embeddings"""
+    centers = l2_normalize(rng.standard_normal((clusters, dim), dtype=np.float32))
+    labels = rng.integers(0, clusters, rows)
+    noise = rng.standard_normal((rows, dim), dtype=np.float32) * 0.08
+    return l2_normalize(centers[labels] + noise)
+
+
+def make_queries(corpus: np.ndarray, count: int, rng: np.random.Generator) -> np.ndarray:
+    """Perturbed corpus rows, so queries fall in realistic regions of the space"""
+    rows = corpus[rng.choice(corpus.shape[0], count, replace=False)]
+    noise = rng.standard_normal(rows.shape, dtype=np.float32) * 0.05
+    return l2_normalize(rows + noise)
+
+
+def main():
+    """Run the sweep and print the recall/latency table"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--embeddings", type=str, help="Path to an .npy embedding matrix")
+    parser.add_argument("--rows", type=int, default=50_000, help="Synthetic corpus size")
+    parser.add_argument("--dim", type=int, default=384, help="Synthetic embedding dimension")
+    parser.add_argument("--queries", type=int, default=500, help="Number of queries")
+    parser.add_argument("--top-k", type=int, default=5, help="k for recall@k")
+    parser.add_argument("--nlist", type=int, default=0, help="IVF cells (0 = auto)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+
+    if args.embeddings:
+        corpus = l2_normalize(np.load(args.embeddings))
+    else:
+        corpus = synthetic_corpus(args.rows, args.dim, clusters=max(10, args.rows // 200), rng=rng)
+    queries = make_queries(corpus, min(args.queries, corpus.shape[0]), rng)
+
+    exact = ExactIndex()
+    exact.build(corpus)
+    start = time.perf_counter()
+    truth = [{idx for idx, _ in exact.search(q, args.top_k)} for q in queries]
+    exact_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    ivf = IVFIndex(nlist=args.nlist)
+    start = time.perf_counter()
+    ivf.build(corpus)
+    build_s = time.perf_counter() - start
+    nlist = ivf.centroids.shape[0]
+
+    print(f"rows={corpus.shape[0]:,} dim={corpus.shape[1]} queries={len(queries)} "
+          f"k={args.top_k} nlist={nlist} (built in {build_s:.1f}s)\n")
+    print(f"{'nprobe':>7} {f'recall@{args.top_k}':>10} {'ms/query':>9} {'speedup':>8}")
+    print("-" * 38)
+    print(f"{'exact':>7} {1.0:>10.4f} {exact_ms:>9.3f} {1.0:>7.1f}x")
+
+    for nprobe in [p for p in NPROBE_SWEEP if p <= nlist]:
+        ivf.nprobe = nprobe
+        start = time.perf_counter()
+        results = [ivf.search(q, args.top_k) for q in queries]
+        ivf_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+        hits = sum(len(expected & {idx for idx, _ in found}) for expected, found in zip(truth, results))
+        recall = hits / sum(len(expected) for expected in truth)
+
+        print(f"{nprobe:>7} {recall:>10.4f} {ivf_ms:>9.3f} {exact_ms / ivf_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
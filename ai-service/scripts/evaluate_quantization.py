@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Recall@k, latency and memory of int8 quantized search vs. exact float32.
+
+Builds an exact index and an int8 quantized index over the same
+embeddings, then sweeps the rescoring shortlist factor (0 = approximate
+scores only) and reports recall@k against exact search, mean per-query
+latency and the size of the scanned matrix, so ANN_BACKEND and
+QUANTIZATION_RESCORE_FACTOR can be chosen.
+
+Usage:
+    # Synthetic clustered corpus
+    python scripts/evaluate_quantization.py --rows 100000
+
+    # Real embeddings (e.g. a matrix from data/embeddings/)
+    python scripts/evaluate_quantization.py --embeddings data/embeddings/icd11_embeddings.<digest>.npy
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models.ann_index import ExactIndex, QuantizedIndex  # noqa: E402
+from app.models.scoring import l2_normalize  # noqa: E402
+
+
+RESCORE_SWEEP = [0, 1, 2, 4, 8]
+
+
+def synthetic_corpus(rows: int, dim: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    """Gaussian mixture on the unit sphere, loosely resembling text embeddings"""
+    centers = l2_normalize(rng.standard_normal((clusters, dim), dtype=np.float32))
+    labels = rng.integers(0, clusters, rows)
+    noise = rng.standard_normal((rows, dim), dtype=np.float32) * 0.08
+    return l2_normalize(centers[labels] + noise)
+
+
+def make_queries(corpus: np.ndarray, count: int, rng: np.random.Generator) -> np.ndarray:
+    """Perturbed corpus rows, so queries fall in realistic regions of the space"""
+    rows = corpus[rng.choice(corpus.shape[0], count, replace=False)]
+    noise = rng.standard_normal(rows.shape, dtype=np.float32) * 0.05
+    return l2_normalize(rows + noise)
+
+
+def main():
+    """Run the sweep and print the recall/latency/memory table"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--embeddings", type=str, help="Path to an .npy embedding matrix")
+    parser.add_argument("--rows", type=int, default=50_000, help="Synthetic corpus size")
+    parser.add_argument("--dim", type=int, default=384, help="Synthetic embedding dimension")
+    parser.add_argument("--queries", type=int, default=500, help="Number of queries")
+    parser.add_argument("--top-k", type=int, default=5, help="k for recall@k")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+
+    if args.embeddings:
+        corpus = l2_normalize(np.load(args.embeddings))
+    else:
+        corpus = synthetic_corpus(args.rows, args.dim, clusters=max(10, args.rows // 200), rng=rng)
+    queries = make_queries(corpus, min(args.queries, corpus.shape[0]), rng)
+
+    exact = ExactIndex()
+    exact.build(corpus)
+    start = time.perf_counter()
+    truth = [{idx for idx, _ in exact.search(q, args.top_k)} for q in queries]
+    exact_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    exact_mb = corpus.nbytes / 2 ** 20
+
+    print(f"rows={corpus.shape[0]:,} dim={corpus.shape[1]} queries={len(queries)} k={args.top_k}\n")
+    print(f"{'index':>6} {'rescore':>8} {f'recall@{args.top_k}':>10} {'ms/query':>9} {'scan MiB':>9}")
+    print("-" * 46)
+    print(f"{'exact':>6} {'-':>8} {1.0:>10.4f} {exact_ms:>9.3f} {exact_mb:>9.1f}")
+
+    index = QuantizedIndex()
+    index.build(corpus)
+    scan_mb = index.memory_bytes / 2 ** 20
+
+    for factor in RESCORE_SWEEP:
+        index.rescore_factor = factor
+        start = time.perf_counter()
+        results = [index.search(q, args.top_k) for q in queries]
+        ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+        hits = sum(len(expected & {idx for idx, _ in found}) for expected, found in zip(truth, results))
+        recall = hits / sum(len(expected) for expected in truth)
+
+        print(f"{index.backend:>6} {factor if factor else 'off':>8} {recall:>10.4f} {ms:>9.3f} {scan_mb:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
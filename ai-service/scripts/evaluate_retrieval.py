@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Retrieval quality report for /recommend: dense vs. BM25 vs. hybrid.
+
+Runs every labeled query through the recommendation pipeline in each
+retrieval mode and reports recall@k, MRR@k and mean latency, so
+RETRIEVAL_MODE, HYBRID_CANDIDATES and RRF_K can be tuned on real data.
+
+The labels file is JSONL, one query per line:
+
+    {"query": "burning sensation in chest after meals", "relevant": ["AYU-001"]}
+    {"query": "joint pain and swelling", "relevant": ["AYU-017", "AYU-018"], "category": "Vata"}
+
+Usage:
+    python scripts/evaluate_retrieval.py --labels data/retrieval_eval.jsonl [--top-k 5]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings  # noqa: E402
+from app.services.mapping_service import mapping_service  # noqa: E402
+
+
+MODES = ["dense", "sparse", "hybrid"]
+
+
+def load_labels(path: str) -> list:
+    """Read labeled queries, skipping blank lines"""
+    examples = []
+    with open(path, 'r') as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            example = json.loads(line)
+            if not example.get("query") or not example.get("relevant"):
+                raise ValueError(f"Line {line_number}: expected 'query' and non-empty 'relevant'")
+            examples.append(example)
+    return examples
+
+
+async def evaluate(examples: list, mode: str, top_k: int) -> dict:
+    """Recall@k, MRR@k and mean latency of one retrieval mode"""
+    recall = reciprocal_rank = latency_ms = 0.0
+
+    for example in examples:
+        result = await mapping_service.get_recommendations(
+            symptoms=example["query"],
+            top_k=top_k,
+            category=example.get("category"),
+            retrieval_mode=mode
+        )
+        found = [rec["code"] for rec in result["recommendations"]]
+        relevant = set(example["relevant"])
+
+        recall += len(relevant.intersection(found)) / len(relevant)
+        first_hit = next((rank for rank, code in enumerate(found, start=1) if code in relevant), None)
+        reciprocal_rank += 1.0 / first_hit if first_hit else 0.0
+        latency_ms += result["processing_time_ms"]
+
+    count = len(examples)
+    return {
+        "recall": recall / count,
+        "mrr": reciprocal_rank / count,
+        "latency_ms": latency_ms / count
+    }
+
+
+async def run(args):
+    """Initialize the service, evaluate each mode and print the table"""
+    # Every query must go through retrieval, not the result cache
+    settings.cache_enabled = False
+    examples = load_labels(args.labels)
+
+    await mapping_service.initialize()
+    try:
+        # Warm up model and thread pool so the first mode is not penalized
+        await evaluate(examples[:1], "dense", args.top_k)
+
+        print(f"queries={len(examples)} k={args.top_k} codes={len(mapping_service.namaste_codes):,} "
+              f"candidates={settings.hybrid_candidates} rrf_k={settings.rrf_k}\n")
+        print(f"{'mode':>8} {f'recall@{args.top_k}':>10} {f'mrr@{args.top_k}':>8} {'ms/query':>9}")
+        print("-" * 38)
+
+        for mode in args.modes:
+            metrics = await evaluate(examples, mode, args.top_k)
+            print(f"{mode:>8} {metrics['recall']:>10.4f} {metrics['mrr']:>8.4f} {metrics['latency_ms']:>9.2f}")
+    finally:
+        await mapping_service.shutdown()
+
+
+def main():
+    """Parse arguments and run the evaluation"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--labels", type=str, required=True, help="Labeled queries (JSONL)")
+    parser.add_argument("--top-k", type=int, default=5, help="k for recall@k and MRR@k")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES, help="Retrieval modes to compare")
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
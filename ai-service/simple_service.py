@@ -3,13 +3,16 @@ Simplified AI Service - Lightweight version without ML dependencies
 Serves AYUSH codes with basic search functionality
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Optional
+from typing import List, Optional, Union
 from pydantic import BaseModel, Field
 import json
 from pathlib import Path
 
+from app.services.search_index import AyushSearchIndex, PrefixSuggester, build_code_index
+from app.services.overlap import WordOverlapScorer
+
 # Create FastAPI app
 app = FastAPI(
     title="NAMOAROGYA AYUSH Service",
@@ -36,6 +39,18 @@ try:
 except Exception as e:
     print(f"Error loading AYUSH codes: {e}")
 
+# Identifier indexes for /ayush/{code} and /ayush/lookup
+codes_by_code = build_code_index(ayush_codes, 'code')
+codes_by_namc_id = build_code_index(ayush_codes, 'namc_id')
+
+# Inverted index for /ayush/search, sorted term array for /ayush/suggest
+search_index = AyushSearchIndex(ayush_codes)
+suggester = PrefixSuggester()
+suggester.build(ayush_codes)
+
+# Code x word matrix for /recommend
+overlap_scorer = WordOverlapScorer(ayush_codes)
+
 # Schemas
 class AyushCode(BaseModel):
     code: str
@@ -56,6 +71,34 @@ class AyushSearchResponse(BaseModel):
     offset: int
     has_more: bool
 
+class AyushSuggestion(BaseModel):
+    code: str
+    text: str
+    matched_field: str
+    name: str
+    name_english: str = ""
+    category: str = ""
+    score: float
+
+class AyushSuggestResponse(BaseModel):
+    prefix: str
+    suggestions: List[AyushSuggestion]
+
+class AyushLookupRequest(BaseModel):
+    codes: List[str] = Field(..., min_length=1, max_length=1000)
+
+class AyushLookupResponse(BaseModel):
+    results: List[AyushCode]
+    not_found: List[str]
+
+class CategoryFacet(BaseModel):
+    name: str
+    count: int
+
+class CategoryFacetsResponse(BaseModel):
+    categories: List[CategoryFacet]
+    total_codes: int
+
 class HealthResponse(BaseModel):
     status: str
     codes_loaded: int
@@ -94,33 +137,15 @@ async def get_models():
 async def search_ayush_codes(
     query: str,
     category: Optional[str] = None,
-    limit: int = 20,
-    offset: int = 0
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0)
 ):
     """Search AYUSH codes by text query"""
-    query_lower = query.lower()
-    results = []
-    
-    for code in ayush_codes:
-        # Skip if category filter doesn't match
-        if category and code.get('category') != category:
-            continue
-        
-        # Search in multiple fields
-        searchable_text = " ".join([
-            code.get('name', ''),
-            code.get('name_english', ''),
-            code.get('name_diacritical', ''),
-            code.get('description', ''),
-            code.get('code', '')
-        ]).lower()
-        
-        if query_lower in searchable_text:
-            results.append(code)
+    rows = search_index.search(query, category)
     
     # Pagination
-    total = len(results)
-    paginated_results = results[offset:offset + limit]
+    total = len(rows)
+    paginated_results = [ayush_codes[row] for row in rows[offset:offset + limit]]
     
     return AyushSearchResponse(
         results=paginated_results,
@@ -130,30 +155,71 @@ async def search_ayush_codes(
         has_more=offset + limit < total
     )
 
+@app.get("/api/v1/ayush/suggest", response_model=AyushSuggestResponse)
+async def suggest_ayush_codes(prefix: str, limit: int = Query(10, ge=1, le=100)):
+    """Autocomplete AYUSH codes by name or code prefix"""
+    suggestions = []
+    for row, term, field, weight in suggester.suggest(prefix, limit):
+        code = ayush_codes[row]
+        suggestions.append(AyushSuggestion(
+            code=code.get('code'),
+            text=term,
+            matched_field=field,
+            name=code.get('name'),
+            name_english=code.get('name_english', ''),
+            category=code.get('category', ''),
+            score=round(weight, 4)
+        ))
+    
+    return AyushSuggestResponse(prefix=prefix, suggestions=suggestions)
+
+@app.get("/api/v1/ayush/categories", response_model=Union[List[str], CategoryFacetsResponse])
+async def get_categories(facets: bool = False):
+    """Get list of all unique categories (with code counts if facets=true)"""
+    counts = search_index.category_counts()
+    if facets:
+        return CategoryFacetsResponse(
+            categories=[CategoryFacet(name=name, count=count) for name, count in counts.items()],
+            total_codes=len(ayush_codes)
+        )
+    
+    return list(counts)
+
 @app.get("/api/v1/ayush/{code}", response_model=AyushCode)
 async def get_ayush_code(code: str):
     """Get specific AYUSH code by ID"""
-    for ayush_code in ayush_codes:
-        if ayush_code.get('code') == code:
-            return AyushCode(**ayush_code)
+    ayush_code = find_ayush_code(code)
+    if ayush_code is None:
+        raise HTTPException(status_code=404, detail=f"AYUSH code not found: {code}")
     
-    raise HTTPException(status_code=404, detail=f"AYUSH code not found: {code}")
-
-@app.get("/api/v1/ayush/categories", response_model=List[str])
-async def get_categories():
-    """Get list of all unique categories"""
-    categories = set()
-    for code in ayush_codes:
-        category = code.get('category')
-        if category:
-            categories.add(category)
+    return AyushCode(**ayush_code)
+
+@app.post("/api/v1/ayush/lookup", response_model=AyushLookupResponse)
+async def lookup_ayush_codes(request: AyushLookupRequest):
+    """Resolve several AYUSH codes in one request"""
+    results = []
+    not_found = []
+    for code in dict.fromkeys(request.codes):
+        ayush_code = find_ayush_code(code)
+        if ayush_code is None:
+            not_found.append(code)
+        else:
+            results.append(AyushCode(**ayush_code))
     
-    return sorted(list(categories))
+    return AyushLookupResponse(results=results, not_found=not_found)
+
+def find_ayush_code(code: str) -> Optional[dict]:
+    """Look up an AYUSH code by code, falling back to NAMC ID"""
+    ayush_code = codes_by_code.get(code)
+    if ayush_code is None:
+        ayush_code = codes_by_namc_id.get(code)
+    return ayush_code
 
 class RecommendationRequest(BaseModel):
     symptoms: str
     patient_history: Optional[str] = None
     top_k: int = 5
+    category: Optional[str] = None
 
 class AyushRecommendation(BaseModel):
     code: str
@@ -179,30 +245,16 @@ async def get_recommendations(request: RecommendationRequest):
     if request.patient_history:
         query += " " + request.patient_history.lower()
     
-    # Simple scoring based on text matching
-    scored_codes = []
-    for code in ayush_codes:
-        searchable = " ".join([
-            code.get('name', ''),
-            code.get('name_english', ''),
-            code.get('description', ''),
-            code.get('short_definition', ''),
-            code.get('long_definition', '')
-        ]).lower()
-        
-        # Count matching words
-        query_words = set(query.split())
-        searchable_words = set(searchable.split())
-        matches = len(query_words & searchable_words)
-        
-        if matches > 0:
-            # Simple confidence score based on matches
-            confidence = min(matches / len(query_words), 1.0)
-            scored_codes.append((code, confidence))
+    # Only codes in the requested category are scored
+    rows = None
+    if request.category:
+        rows = search_index.category_rows.get(request.category, [])
     
-    # Sort by confidence and get top-k
-    scored_codes.sort(key=lambda x: x[1], reverse=True)
-    top_codes = scored_codes[:request.top_k]
+    # Fraction of query words found in each code's text
+    top_codes = [
+        (ayush_codes[row], confidence)
+        for row, confidence in overlap_scorer.top_k(query, request.top_k, rows)
+    ]
     
     # Build recommendations
     recommendations = []